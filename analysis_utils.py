@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Frame-timing and quality analysis for finished recordings
+
+Packet timestamps and sizes are streamed from ffprobe one packet at a time
+and folded into running statistics, so memory stays flat however long the
+recording is. The report covers frame-interval jitter, gaps, effective fps,
+runs of duplicated frames and a per-second bitrate curve. It is saved next to
+the recording as `<name>.analysis.json`.
+
+x11grab delivers a frame on every tick even when nothing changed, and the
+encoder turns an unchanged frame into a tiny packet. A run of tiny non-key
+packets is therefore counted as a run of duplicated frames.
+"""
+
+import heapq
+import json
+import math
+import os
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from trim_utils import iter_packets
+
+# Packets at or below this size are treated as repeats of the previous frame
+DUPLICATE_PACKET_BYTES = 100
+
+# An interval this many times the nominal one counts as a gap
+GAP_FACTOR = 2.0
+
+# Packets held back to put decode order into presentation order
+REORDER_WINDOW = 16
+
+# Longest runs and gaps kept in the report
+TOP_EVENTS = 10
+
+
+def nominal_fps(path: Path) -> Optional[float]:
+    """Frame rate declared by the video stream"""
+    result = subprocess.run(
+        ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+         '-show_entries', 'stream=r_frame_rate', '-of', 'csv=p=0', str(path)],
+        capture_output=True, text=True
+    )
+    num, _, den = result.stdout.strip().partition('/')
+    try:
+        fps = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return fps if 0 < fps <= 1000 else None
+
+
+def presentation_order(packets: Iterator[List[str]]) -> Iterator[Tuple[float, int, str]]:
+    """Yield (pts, size, flags) sorted by pts using a small reorder window"""
+    heap: List[Tuple[float, int, str]] = []
+    for pts, size, flags in packets:
+        try:
+            heapq.heappush(heap, (float(pts), int(size), flags))
+        except ValueError:
+            continue
+        if len(heap) > REORDER_WINDOW:
+            yield heapq.heappop(heap)
+    while heap:
+        yield heapq.heappop(heap)
+
+
+class FrameAnalysis:
+    def __init__(self, recording: Path, fps: Optional[float]):
+        self.recording = recording
+        self.nominal_fps = fps
+        self.frames = 0
+        self.bytes = 0
+        self.first_pts: Optional[float] = None
+        self.last_pts: Optional[float] = None
+        # Running mean and variance of frame intervals (Welford)
+        self.intervals = 0
+        self.interval_mean = 0.0
+        self.interval_m2 = 0.0
+        self.interval_max = 0.0
+        self.gaps: List[Tuple[float, float]] = []
+        self.gap_count = 0
+        self.duplicate_frames = 0
+        self.duplicate_runs = 0
+        self.longest_runs: List[Tuple[float, int]] = []
+        self.bitrate_kbps: List[float] = []
+
+    def add_interval(self, at: float, interval: float):
+        self.intervals += 1
+        delta = interval - self.interval_mean
+        self.interval_mean += delta / self.intervals
+        self.interval_m2 += delta * (interval - self.interval_mean)
+        self.interval_max = max(self.interval_max, interval)
+        expected = 1 / self.nominal_fps if self.nominal_fps else None
+        if expected and interval > expected * GAP_FACTOR:
+            self.gap_count += 1
+            self.gaps.append((at, interval))
+            self.gaps = sorted(self.gaps, key=lambda g: g[1], reverse=True)[:TOP_EVENTS]
+
+    def add_run(self, start: float, length: int):
+        self.duplicate_runs += 1
+        self.duplicate_frames += length
+        self.longest_runs.append((start, length))
+        self.longest_runs = sorted(self.longest_runs, key=lambda r: r[1], reverse=True)[:TOP_EVENTS]
+
+    @property
+    def duration(self) -> float:
+        if self.first_pts is None:
+            return 0.0
+        # The last frame is shown for one interval too
+        return self.last_pts - self.first_pts + (self.interval_mean or 0.0)
+
+    @property
+    def effective_fps(self) -> float:
+        return self.frames / self.duration if self.duration > 0 else 0.0
+
+    @property
+    def unique_fps(self) -> float:
+        return (self.frames - self.duplicate_frames) / self.duration if self.duration > 0 else 0.0
+
+    @property
+    def jitter_ms(self) -> float:
+        """Standard deviation of the frame interval"""
+        if self.intervals < 2:
+            return 0.0
+        return math.sqrt(self.interval_m2 / (self.intervals - 1)) * 1000
+
+    def to_dict(self) -> Dict:
+        return {
+            'recording': self.recording.name,
+            'frames': self.frames,
+            'duration_seconds': round(self.duration, 3),
+            'nominal_fps': self.nominal_fps,
+            'effective_fps': round(self.effective_fps, 2),
+            'unique_fps': round(self.unique_fps, 2),
+            'interval_mean_ms': round(self.interval_mean * 1000, 3),
+            'interval_max_ms': round(self.interval_max * 1000, 3),
+            'jitter_ms': round(self.jitter_ms, 3),
+            'gap_count': self.gap_count,
+            'worst_gaps': [{'at': round(at, 3), 'ms': round(gap * 1000, 1)} for at, gap in self.gaps],
+            'duplicate_frames': self.duplicate_frames,
+            'duplicate_runs': self.duplicate_runs,
+            'longest_duplicate_runs': [{'at': round(at, 3), 'frames': n} for at, n in self.longest_runs],
+            'bitrate_kbps': [round(kbps, 1) for kbps in self.bitrate_kbps],
+        }
+
+    def __str__(self):
+        fps = f"{self.effective_fps:.1f}"
+        if self.nominal_fps:
+            fps += f"/{self.nominal_fps:g}"
+        parts = [f"{fps} fps", f"jitter {self.jitter_ms:.1f} ms"]
+        if self.gap_count:
+            parts.append(f"{self.gap_count} gaps (worst {self.gaps[0][1] * 1000:.0f} ms)")
+        if self.duplicate_frames:
+            parts.append(f"{self.duplicate_frames / max(1, self.frames):.0%} duplicated")
+        if self.bitrate_kbps:
+            parts.append(f"peak {max(self.bitrate_kbps) / 1000:.1f} Mb/s")
+        return " • ".join(parts)
+
+
+def analyze(recording: Path, fps: Optional[float] = None) -> FrameAnalysis:
+    """Stream a recording's video packets and measure its frame timing"""
+    analysis = FrameAnalysis(recording, fps or nominal_fps(recording))
+    run_start: Optional[float] = None
+    run_length = 0
+    second = 0
+    second_bytes = 0
+
+    for pts, size, flags in presentation_order(iter_packets(recording, 'pts_time,size,flags')):
+        if analysis.first_pts is None:
+            analysis.first_pts = pts
+        else:
+            analysis.add_interval(pts, pts - analysis.last_pts)
+        analysis.last_pts = pts
+        analysis.frames += 1
+        analysis.bytes += size
+
+        # Bitrate curve, one point per second of recording
+        bucket = int(pts - analysis.first_pts)
+        while bucket > second:
+            analysis.bitrate_kbps.append(second_bytes * 8 / 1000)
+            second += 1
+            second_bytes = 0
+        second_bytes += size
+
+        if size <= DUPLICATE_PACKET_BYTES and 'K' not in flags:
+            if run_length == 0:
+                run_start = pts
+            run_length += 1
+        elif run_length:
+            analysis.add_run(run_start, run_length)
+            run_length = 0
+
+    if run_length:
+        analysis.add_run(run_start, run_length)
+    if analysis.frames:
+        analysis.bitrate_kbps.append(second_bytes * 8 / 1000)
+    return analysis
+
+
+def report_path(recording: Path, directory: Optional[Path] = None) -> Path:
+    return (directory or recording.parent) / f'{recording.stem}.analysis.json'
+
+
+def save_report(analysis: FrameAnalysis, directory: Optional[Path] = None) -> Path:
+    """Write the report next to the recording (or into `directory`), atomically"""
+    target = report_path(analysis.recording, directory)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp = target.with_suffix('.tmp')
+    with open(temp, 'w') as f:
+        json.dump(analysis.to_dict(), f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, target)
+    return target
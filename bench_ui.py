@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+UI-responsiveness benchmark for Recit
+
+Drives SimpleRecorderApp headlessly through Textual's pilot with stub
+executables standing in for slop, scrot, convert, xrandr, ffmpeg and ffprobe,
+and measures time-to-first-paint, time-to-interactive, and input-to-status-update
+latency and event-loop stalls for each action. Latency runs from the moment
+the app receives the key or mouse event to the status-line update, so the
+pilot's own overhead (tens to hundreds of ms, mostly waiting for repaints)
+is not counted. It also records into a (forced) staging directory and starts
+a second recording while the first is still being analyzed, checking that
+each recording ends up in the output directory intact. Exits non-zero when
+anything exceeds its thresholds or a recording goes missing.
+
+    python3 bench_ui.py
+    python3 bench_ui.py --delay xrandr=1   # first paint must not wait for detection
+    python3 bench_ui.py --delay slop=0.5 --delay ffmpeg=0.2 --max-latency-ms 300
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import stat
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+XRANDR_OUTPUT = """Screen 0: minimum 320 x 200, current 1920 x 1080, maximum 16384 x 16384
+HDMI-1 connected primary 1920x1080+0+0 (normal left inverted right x axis y axis) 527mm x 296mm
+   1920x1080     60.00*+  59.94    50.00
+   1280x720      60.00    59.94
+"""
+
+# Each stub sleeps for RECIT_STUB_<TOOL>_DELAY seconds before doing its job
+STUBS = {
+    'slop': 'echo "100,100,640,480"',
+    'scrot': 'echo stub > "${@: -1}"',
+    'convert': 'cp "$1" "$2"',
+    'xrandr': f"cat <<'EOF'\n{XRANDR_OUTPUT}EOF",
+    'xdpyinfo': 'echo "  dimensions:    1920x1080 pixels"',
+    'ffmpeg': 'echo stub > "${@: -1}"\ntrap "exit 0" TERM INT\nwhile true; do sleep 0.05; done',
+    # No packets: analysis finds nothing to report, after the delay
+    'ffprobe': 'true',
+}
+
+# ffprobe delay while checking a recording started during the previous one's analysis
+ANALYSIS_DELAY = 2.0
+
+
+def write_stubs(bin_dir: Path):
+    """Create stub executables in bin_dir"""
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    for tool, body in STUBS.items():
+        delay_var = f"RECIT_STUB_{tool.upper()}_DELAY"
+        script = bin_dir / tool
+        script.write_text(f'#!/bin/bash\nsleep "${{{delay_var}:-0}}"\n{body}\n')
+        script.chmod(script.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+
+class ActionResult:
+    def __init__(self, name: str, latency: float, worst_stall: float, ok: bool):
+        self.name = name
+        self.latency = latency
+        self.worst_stall = worst_stall
+        self.ok = ok
+
+    def __str__(self):
+        mark = "✅" if self.ok else "❌"
+        return f"{mark} {self.name:<12} latency {self.latency * 1000:7.1f} ms   worst stall {self.worst_stall * 1000:7.1f} ms"
+
+
+class UpdateClock:
+    """Timestamps input events as the app receives them and status updates as they are made"""
+
+    def __init__(self, app):
+        from textual import events
+
+        self.inputs: List[float] = []
+        self.updates: List[Tuple[float, str]] = []
+        on_event = app.on_event
+        status = app.query_one("#status")
+        update = status.update
+
+        async def timed_event(event):
+            # A click reaches the app as MouseDown then MouseUp; the button fires on the latter
+            if isinstance(event, (events.Key, events.MouseUp)):
+                self.inputs.append(time.perf_counter())
+            return await on_event(event)
+
+        def timed_update(content='', *args, **kwargs):
+            self.updates.append((time.perf_counter(), str(content)))
+            return update(content, *args, **kwargs)
+
+        app.on_event = timed_event
+        status.update = timed_update
+
+    def reset(self):
+        self.inputs.clear()
+        self.updates.clear()
+
+    def first_update(self, done: Callable[[str], bool]) -> Optional[float]:
+        return next((at for at, text in self.updates if done(text)), None)
+
+    def latency(self, done: Callable[[str], bool]) -> Optional[float]:
+        """Time from the last input event to the first update satisfying `done`"""
+        updated = self.first_update(done)
+        inputs = [at for at in self.inputs if updated is not None and at <= updated]
+        return updated - inputs[-1] if inputs else None
+
+
+async def measure(app, pilot, clock: UpdateClock, name: str, trigger: Callable,
+                  done: Callable[[str], bool], max_latency: float, max_stall: float,
+                  timeout: float = 10.0) -> ActionResult:
+    """Run one action and time it from input event to a status update satisfying `done`"""
+    app.watchdog.stalls.clear()
+    clock.reset()
+    start = time.perf_counter()
+    await trigger()
+    while clock.first_update(done) is None:
+        if time.perf_counter() - start > timeout:
+            break
+        await pilot.pause(0.005)
+    latency = clock.latency(done)
+    if latency is None:
+        latency = timeout
+    # Let the heartbeat catch up so a stall ending with the action is counted
+    await pilot.pause(0.05)
+    worst = app.watchdog.worst()
+    worst_stall = worst.duration if worst else 0.0
+    ok = latency <= max_latency and worst_stall <= max_stall
+    return ActionResult(name, latency, worst_stall, ok)
+
+
+def watch_first_paint(app) -> Dict[str, bool]:
+    """Note whether the custom themes were already registered when the first frame was painted"""
+    state = {}
+    mark_startup = app.mark_startup
+
+    def checked_mark_startup(milestone):
+        if milestone == 'first_paint':
+            state['themes_loaded'] = app.custom_themes_loaded
+        mark_startup(milestone)
+
+    app.mark_startup = checked_mark_startup
+    return state
+
+
+async def measure_startup(app, pilot, first_paint_state: Dict[str, bool], max_first_paint: float,
+                          max_interactive: float, max_stall: float,
+                          timeout: float = 10.0) -> List[ActionResult]:
+    """Wait for the app to become interactive and check its startup milestones"""
+    start = time.perf_counter()
+    while 'interactive' not in app.startup_times and time.perf_counter() - start < timeout:
+        await pilot.pause(0.005)
+    worst = app.watchdog.worst()
+    worst_stall = worst.duration if worst else 0.0
+    first_paint = app.startup_times.get('first_paint', timeout)
+    interactive = app.startup_times.get('interactive', timeout)
+    # Registering every theme before the first frame is the cost deferral is meant to avoid
+    deferred = first_paint_state.get('themes_loaded') is False
+    return [
+        ActionResult("first paint" if deferred else "first paint (themes not deferred)",
+                     first_paint, worst_stall,
+                     deferred and first_paint <= max_first_paint and worst_stall <= max_stall),
+        ActionResult("interactive", interactive, worst_stall,
+                     interactive <= max_interactive and worst_stall <= max_stall),
+    ]
+
+
+async def run_benchmark(max_latency: float, max_stall: float,
+                        max_first_paint: float, max_interactive: float) -> List[ActionResult]:
+    from recit import SimpleRecorderApp
+
+    app = SimpleRecorderApp()
+    first_paint_state = watch_first_paint(app)
+    results = []
+    async with app.run_test(headless=True, size=(80, 21)) as pilot:
+        results += await measure_startup(app, pilot, first_paint_state, max_first_paint,
+                                         max_interactive, max_stall)
+        await pilot.pause(0.1)
+        clock = UpdateClock(app)
+
+        results.append(await measure(
+            app, pilot, clock, "record full",
+            lambda: pilot.press("r"), lambda s: "Recording" in s,
+            max_latency, max_stall))
+        await pilot.pause(0.2)
+        results.append(await measure(
+            app, pilot, clock, "stop",
+            lambda: pilot.press("s"), lambda s: s.startswith("✅ Recording"),
+            max_latency, max_stall))
+        results.append(await measure(
+            app, pilot, clock, "record area",
+            lambda: pilot.press("a"), lambda s: "Recording" in s,
+            max_latency, max_stall))
+        await pilot.pause(0.2)
+        await pilot.press("s")
+        await pilot.pause(0.1)
+        results.append(await measure(
+            app, pilot, clock, "png area",
+            lambda: pilot.click("#png-area"), lambda s: "Screenshot saved" in s,
+            max_latency, max_stall))
+        results.append(await measure(
+            app, pilot, clock, "webp area",
+            lambda: pilot.click("#webp-area"), lambda s: "Screenshot saved" in s,
+            max_latency, max_stall))
+        results.append(await record_during_analysis(app, pilot, clock, max_latency, max_stall))
+    return results
+
+
+async def record_during_analysis(app, pilot, clock: UpdateClock, max_latency: float,
+                                 max_stall: float, timeout: float = 20.0) -> ActionResult:
+    """Stage two recordings, starting the second while the first is still being analyzed.
+
+    Both must end up in the output directory, and the second must not be moved
+    while ffmpeg is still writing it.
+    """
+    manager = app.output_manager
+    output_dir = manager.output_dir
+    # Pretend the output directory is too slow, so recordings are staged
+    manager.throughput[output_dir] = 1.0
+    os.environ['RECIT_STUB_FFPROBE_DELAY'] = str(ANALYSIS_DELAY)
+    try:
+        await pilot.press("r")
+        await pilot.pause(0.2)
+        first = app.output_file
+        await pilot.press("s")
+        # Recording names have one-second resolution
+        await pilot.pause(1.1)
+        result = await measure(app, pilot, clock, "rec analyzing",
+                               lambda: pilot.press("r"), lambda s: "Recording" in s,
+                               max_latency, max_stall)
+        second = app.output_file
+        staged = app.recording_staged and first.parent == second.parent == manager.staging_dir
+
+        # The first recording moves once its analysis is done; the live one must stay put
+        start = time.perf_counter()
+        while not (output_dir / first.name).exists() and time.perf_counter() - start < timeout:
+            await pilot.pause(0.05)
+        first_moved = (output_dir / first.name).exists() and not first.exists()
+        second_intact = second.exists() and not (output_dir / second.name).exists()
+
+        await pilot.press("s")
+        start = time.perf_counter()
+        while not (output_dir / second.name).exists() and time.perf_counter() - start < timeout:
+            await pilot.pause(0.05)
+        second_moved = (output_dir / second.name).exists()
+    finally:
+        os.environ.pop('RECIT_STUB_FFPROBE_DELAY', None)
+
+    result.ok = result.ok and staged and first_moved and second_intact and second_moved
+    if not result.ok:
+        result.name += " (lost)"
+    return result
+
+
+def parse_delays(values: List[str]) -> Dict[str, float]:
+    delays = {}
+    for value in values:
+        tool, _, seconds = value.partition('=')
+        if tool not in STUBS:
+            raise SystemExit(f"Unknown tool '{tool}' (choose from {', '.join(STUBS)})")
+        delays[tool] = float(seconds)
+    return delays
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Measure Recit UI responsiveness with stub capture tools")
+    parser.add_argument('--delay', action='append', default=[], metavar='TOOL=SECONDS',
+                        help="Make a stub tool sleep before responding (repeatable)")
+    # Handlers measure ~5-20 ms here; the budget leaves room for slow CI machines
+    parser.add_argument('--max-latency-ms', type=float, default=100.0,
+                        help="Fail if input-to-status latency exceeds this")
+    parser.add_argument('--max-stall-ms', type=float, default=100.0,
+                        help="Fail if any event-loop stall during an action exceeds this")
+    parser.add_argument('--max-first-paint-ms', type=float, default=300.0,
+                        help="Fail if the first frame takes longer than this after startup")
+    parser.add_argument('--max-interactive-ms', type=float, default=1000.0,
+                        help="Fail if display detection and estimates take longer than this")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='recit-bench-') as tmp:
+        tmp_path = Path(tmp)
+        write_stubs(tmp_path / 'bin')
+        os.environ['PATH'] = f"{tmp_path / 'bin'}{os.pathsep}{os.environ.get('PATH', '')}"
+        os.environ['HOME'] = str(tmp_path / 'home')
+        for tool, seconds in parse_delays(args.delay).items():
+            os.environ[f"RECIT_STUB_{tool.upper()}_DELAY"] = str(seconds)
+
+        config_dir = tmp_path / 'home' / '.config' / 'recit'
+        config_dir.mkdir(parents=True)
+        (config_dir / 'config.json').write_text(json.dumps({
+            'output_dir': str(tmp_path / 'out'),
+            'staging_dir': str(tmp_path / 'staging'),
+            'stall_threshold_ms': 16,
+            # Fixed capture settings, so the capture planner's encoder probe doesn't run
+            'framerate': 30,
+            'resolution': '720p',
+        }))
+
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        results = asyncio.run(run_benchmark(args.max_latency_ms / 1000, args.max_stall_ms / 1000,
+                                            args.max_first_paint_ms / 1000, args.max_interactive_ms / 1000))
+
+    print("⏱️  Recit UI responsiveness")
+    print("=" * 60)
+    for result in results:
+        print(result)
+
+    failed = [r for r in results if not r.ok]
+    if failed:
+        print(f"\n{len(failed)} action(s) failed or over budget "
+              f"(latency {args.max_latency_ms:.0f} ms, stall {args.max_stall_ms:.0f} ms)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
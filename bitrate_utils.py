@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Target-size encoding utilities: probe encodes and content-adaptive CRF
+"""
+
+import math
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# CRFs tried on the probe sample; the final CRF is interpolated between them
+PROBE_CRFS = (20, 32, 44, 56)
+MIN_CRF = 4
+MAX_CRF = 63
+
+
+class SizeTarget:
+    """A recording size goal: MB per minute, a total size cap, or both"""
+
+    def __init__(self, mb_per_min: Optional[float] = None, size_cap_mb: Optional[float] = None,
+                 expected_minutes: float = 5.0):
+        self.mb_per_min = mb_per_min
+        self.size_cap_mb = size_cap_mb
+        self.expected_minutes = expected_minutes
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.mb_per_min or self.size_cap_mb)
+
+    @property
+    def bitrate(self) -> Optional[float]:
+        """Target bitrate in bytes per second"""
+        rates = []
+        if self.mb_per_min:
+            rates.append(self.mb_per_min * 1024 * 1024 / 60)
+        if self.size_cap_mb:
+            rates.append(self.size_cap_mb * 1024 * 1024 / (self.expected_minutes * 60))
+        return min(rates) if rates else None
+
+    @property
+    def size_cap_bytes(self) -> Optional[int]:
+        return int(self.size_cap_mb * 1024 * 1024) if self.size_cap_mb else None
+
+    def __str__(self):
+        parts = []
+        if self.mb_per_min:
+            parts.append(f"{self.mb_per_min:g} MB/min")
+        if self.size_cap_mb:
+            parts.append(f"≤ {self.size_cap_mb:g} MB")
+        return " • ".join(parts)
+
+
+def capture_sample(input_args: List[str], filter_args: List[str], output: Path, seconds: float = 1.5):
+    """Grab a short lossless sample of what is about to be recorded"""
+    cmd = ['ffmpeg', '-y', '-loglevel', 'error'] + input_args + filter_args + [
+        '-t', str(seconds), '-c:v', 'libx264', '-preset', 'ultrafast', '-qp', '0', str(output)
+    ]
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30)
+
+
+def probe_bitrate(sample: Path, crf: int, duration: float) -> float:
+    """Encode the sample at `crf` and return the resulting bytes per second"""
+    with tempfile.TemporaryDirectory(prefix='recit-probe-') as tmp:
+        output = Path(tmp) / f'probe_{crf}.webm'
+        cmd = ['ffmpeg', '-y', '-loglevel', 'error', '-i', str(sample),
+               '-c:v', 'libvpx-vp9', '-crf', str(crf), '-b:v', '0',
+               '-deadline', 'realtime', '-cpu-used', '8', '-row-mt', '1', str(output)]
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=60)
+        return output.stat().st_size / duration
+
+
+def interpolate_crf(bitrates: Dict[int, float], target: float) -> int:
+    """Pick the CRF whose bitrate matches `target`, assuming log(bitrate) is linear in CRF"""
+    points = sorted((crf, math.log(max(rate, 1.0))) for crf, rate in bitrates.items())
+    goal = math.log(max(target, 1.0))
+
+    # Bitrate falls as CRF rises; find the pair of probes that brackets the goal
+    for (crf_a, log_a), (crf_b, log_b) in zip(points, points[1:]):
+        if log_b <= goal <= log_a:
+            if log_a == log_b:
+                return crf_a
+            crf = crf_a + (log_a - goal) * (crf_b - crf_a) / (log_a - log_b)
+            return max(MIN_CRF, min(MAX_CRF, round(crf)))
+
+    # Outside the probed range: extrapolate from the nearest pair
+    (crf_a, log_a), (crf_b, log_b) = (points[0], points[1]) if goal > points[0][1] else (points[-2], points[-1])
+    slope = (log_b - log_a) / (crf_b - crf_a) if crf_b != crf_a else -0.1
+    if slope >= 0:
+        slope = -0.1
+    crf = crf_a + (goal - log_a) / slope
+    return max(MIN_CRF, min(MAX_CRF, round(crf)))
+
+
+class CrfPlan:
+    def __init__(self, crf: int, target: float, predicted: float, bitrates: Dict[int, float]):
+        self.crf = crf
+        self.target = target
+        self.predicted = predicted
+        self.bitrates = bitrates
+
+    def encoder_args(self, size_target: SizeTarget) -> List[str]:
+        """VP9 constrained-quality arguments: CRF for quality, -b:v as the ceiling"""
+        args = ['-c:v', 'libvpx-vp9', '-crf', str(self.crf), '-b:v', f'{int(self.target * 8)}']
+        if size_target.size_cap_bytes:
+            args.extend(['-fs', str(size_target.size_cap_bytes)])
+        return args
+
+
+def plan_crf(input_args: List[str], filter_args: List[str], target: float,
+             bias: float = 1.0, seconds: float = 1.5) -> CrfPlan:
+    """Probe the current screen content and choose a CRF for `target` bytes/s.
+
+    `bias` is the ratio of actual to predicted bitrate seen on earlier
+    recordings; the goal is divided by it to correct for systematic error
+    between the fast probe encodes and the real encode.
+    """
+    with tempfile.TemporaryDirectory(prefix='recit-probe-') as tmp:
+        sample = Path(tmp) / 'sample.mkv'
+        capture_sample(input_args, filter_args, sample, seconds)
+        with ThreadPoolExecutor(max_workers=len(PROBE_CRFS)) as pool:
+            rates = pool.map(lambda crf: probe_bitrate(sample, crf, seconds), PROBE_CRFS)
+            bitrates = dict(zip(PROBE_CRFS, rates))
+
+    crf = interpolate_crf(bitrates, target / bias)
+    predicted = interpolate_bitrate(bitrates, crf) * bias
+    return CrfPlan(crf, target, predicted, bitrates)
+
+
+def interpolate_bitrate(bitrates: Dict[int, float], crf: int) -> float:
+    """Estimate the bitrate at `crf` from the probe results"""
+    points = sorted(bitrates.items())
+    for (crf_a, rate_a), (crf_b, rate_b) in zip(points, points[1:]):
+        if crf_a <= crf <= crf_b:
+            t = (crf - crf_a) / (crf_b - crf_a)
+            return math.exp(math.log(max(rate_a, 1.0)) * (1 - t) + math.log(max(rate_b, 1.0)) * t)
+    return points[0][1] if crf < points[0][0] else points[-1][1]
+
+
+def describe_result(size_bytes: int, duration: float, size_target: SizeTarget) -> str:
+    """Summarize how close a finished recording came to its size target"""
+    size_mb = size_bytes / (1024 * 1024)
+    parts = []
+    if size_target.mb_per_min and duration > 0:
+        actual = size_mb / (duration / 60)
+        error = (actual / size_target.mb_per_min - 1) * 100
+        parts.append(f"{actual:.1f} MB/min vs {size_target.mb_per_min:g} target ({error:+.0f}%)")
+    if size_target.size_cap_mb:
+        parts.append(f"{size_mb:.1f} of {size_target.size_cap_mb:g} MB cap")
+    return " • ".join(parts)
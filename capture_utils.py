@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Capture planner: pick the framerate and output size this machine can record
+in realtime
+
+The encoder's throughput is measured on the host with a short synthetic
+encode (lavfi testsrc2) using the same encoder settings as a recording, and
+expressed in pixels per second. Candidate framerates are whole divisors of
+the monitor's refresh rate, so every captured frame lines up with a real
+display frame. Candidate heights are standard sizes no larger than the
+monitor. The planner keeps the largest size that still reaches a smooth
+framerate within the measured budget, and records the reasoning.
+
+A plan is tied to the monitor topology and the system load it was made
+under; `replan_reason` says when either has moved enough to plan again.
+"""
+
+import os
+import subprocess
+import time
+from typing import List, Optional
+
+from monitor_utils import Monitor
+
+# Standard output heights, largest first
+HEIGHTS = (1080, 720, 480)
+
+# Framerates never go above this; beyond it screen recordings just get bigger
+MAX_FPS = 60
+
+# The planner prefers a smaller size over dropping below this framerate
+SMOOTH_FPS = 30
+
+# NTSC-style rates (29.97 on a 59.94 Hz panel) count as reaching SMOOTH_FPS
+SMOOTH_TOLERANCE = 0.99
+
+# Fraction of the measured throughput a plan may use (capture and scaling need the rest)
+HEADROOM = 0.7
+
+# Size and length of the synthetic encode used to measure throughput
+PROBE_SIZE = (960, 540)
+PROBE_FRAMES = 30
+PROBE_TIMEOUT = 30
+
+# Re-plan when the load per CPU moves by more than this
+LOAD_CHANGE = 0.25
+
+# Used when the refresh rate is unknown
+FALLBACK_RATES = (60, 30, 25, 24, 20, 15)
+
+
+def load_per_cpu() -> float:
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except OSError:
+        return 0.0
+
+
+def is_smooth(fps: float) -> bool:
+    return fps >= SMOOTH_FPS * SMOOTH_TOLERANCE
+
+
+def refresh_divisors(refresh: Optional[float], max_fps: float = MAX_FPS) -> List[float]:
+    """Framerates that divide the refresh rate evenly, highest first"""
+    if not refresh:
+        return [float(r) for r in FALLBACK_RATES if r <= max_fps]
+    rates = []
+    for divisor in range(1, int(refresh) + 1):
+        rate = refresh / divisor
+        if rate < 10:
+            break
+        if rate <= max_fps:
+            rates.append(round(rate, 3))
+    return rates
+
+
+def measure_throughput(encoder_args: List[str]) -> float:
+    """Pixels per second the encoder sustains here, from a short synthetic encode"""
+    width, height = PROBE_SIZE
+    cmd = ['ffmpeg', '-hide_banner', '-v', 'error', '-f', 'lavfi',
+           '-i', f'testsrc2=size={width}x{height}:rate=30',
+           '-frames:v', str(PROBE_FRAMES)] + encoder_args + ['-f', 'null', '-']
+    began = time.perf_counter()
+    try:
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                       timeout=PROBE_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        # Not even PROBE_FRAMES in PROBE_TIMEOUT: treat the whole timeout as spent
+        pass
+    elapsed = max(time.perf_counter() - began, 1e-3)
+    return width * height * PROBE_FRAMES / elapsed
+
+
+class CapturePlan:
+    def __init__(self, monitor: Monitor, fps: float, height: int, throughput: float,
+                 load: float, reasons: List[str]):
+        self.monitor = monitor
+        self.fps = fps
+        self.height = height
+        self.throughput = throughput
+        self.load = load
+        self.reasons = reasons
+        self.signature = monitor.signature
+
+    @property
+    def width(self) -> int:
+        # Even width, like scale=-2
+        return int(round(self.height * self.monitor.aspect_ratio / 2)) * 2
+
+    def explain(self) -> str:
+        return " • ".join(self.reasons)
+
+    def __str__(self):
+        return f"{self.width}x{self.height} @ {self.fps:g} fps"
+
+
+class CapturePlanner:
+    def __init__(self, encoder_args: List[str], headroom: float = HEADROOM, max_fps: float = MAX_FPS):
+        self.encoder_args = encoder_args
+        self.headroom = headroom
+        self.max_fps = max_fps
+
+    def plan(self, monitor: Monitor, reason: Optional[str] = None,
+             throughput: Optional[float] = None) -> CapturePlan:
+        """Measure the encoder (unless `throughput` is given) and choose fps and size"""
+        load = load_per_cpu()
+        throughput = throughput or measure_throughput(self.encoder_args)
+        budget = throughput * self.headroom
+        rates = refresh_divisors(monitor.refresh_rate, self.max_fps)
+        heights = [h for h in HEIGHTS if h <= monitor.height]
+        if monitor.height < HEIGHTS[0] and monitor.height not in heights:
+            heights.insert(0, monitor.height)
+
+        reasons = [reason] if reason else []
+        if monitor.refresh_rate:
+            reasons.append(f"{monitor.name} refreshes at {monitor.refresh_rate:g} Hz")
+        else:
+            reasons.append(f"{monitor.name} refresh rate unknown")
+        reasons.append(f"encoder sustains ~{budget / 1e6:.0f} Mpx/s here (load {load:.2f}/CPU)")
+
+        best = None
+        for height in heights:
+            pixels = height * monitor.aspect_ratio * height
+            fitting = [r for r in rates if pixels * r <= budget]
+            if not fitting:
+                continue
+            if is_smooth(fitting[0]) or height == heights[-1]:
+                best = (height, fitting[0])
+                break
+            if best is None or fitting[0] > best[1]:
+                best = (height, fitting[0])
+        if best is None:
+            # Nothing fits: the smallest size at the lowest rate is the least bad choice
+            best = (heights[-1], rates[-1])
+            reasons.append("no size fits the budget in realtime; expect dropped frames")
+
+        height, fps = best
+        if monitor.refresh_rate:
+            divisor = monitor.refresh_rate / fps
+            reasons.append(f"{fps:g} fps is 1/{divisor:.0f} of the refresh rate")
+        larger = [h for h in heights if h > height]
+        if larger:
+            reasons.append(f"{larger[-1]}p would fall below {SMOOTH_FPS} fps")
+        return CapturePlan(monitor, fps, height, throughput, load, reasons)
+
+    def replan_reason(self, plan: Optional[CapturePlan], monitor: Optional[Monitor]) -> Optional[str]:
+        """Why `plan` is out of date, or None if it still holds"""
+        if monitor is None:
+            return None
+        if plan is None:
+            return "no plan yet"
+        if monitor.signature != plan.signature:
+            return "display changed"
+        load = load_per_cpu()
+        if abs(load - plan.load) > LOAD_CHANGE:
+            return f"load changed ({plan.load:.2f} → {load:.2f}/CPU)"
+        return None
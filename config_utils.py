@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Configuration: one validated read of config.json, debounced atomic writes
+and hot reload on external edits
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bitrate_utils import SizeTarget
+from retention_utils import RetentionPolicy
+from stream_utils import stream_format
+
+CONFIG_DIR = Path.home() / '.config' / 'recit'
+
+
+def _default_output_dir() -> str:
+    return str(Path.home() / 'Videos' / 'Recordings')
+
+
+def _optional(check: Callable[[Any], bool]) -> Callable[[Any], bool]:
+    return lambda value: value is None or check(value)
+
+
+def _positive(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+
+
+def _positive_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
+def _string(value) -> bool:
+    return isinstance(value, str) and value != ''
+
+
+def _strings(value) -> bool:
+    return isinstance(value, list) and all(_string(v) for v in value)
+
+
+def _stream_urls(value) -> bool:
+    if not _strings(value):
+        return False
+    try:
+        for url in value:
+            stream_format(url)
+    except ValueError:
+        return False
+    return True
+
+
+def _retention(value) -> bool:
+    if not isinstance(value, dict):
+        return False
+    try:
+        RetentionPolicy.from_dict(value)
+    except (ValueError, TypeError):
+        return False
+    return True
+
+
+# key: (default or default factory, validator)
+SCHEMA: Dict[str, Tuple[Any, Callable[[Any], bool]]] = {
+    'output_dir': (_default_output_dir, _string),
+    'format': ('webm', lambda v: v in ('webm', 'mp4')),
+    # None lets the capture planner choose
+    'framerate': (None, _optional(lambda v: _positive(v) and v <= 240)),
+    'resolution': (None, _optional(lambda v: v in ('480p', '720p', '1080p'))),
+    'theme': (None, _optional(_string)),
+    'stall_threshold_ms': (100, _positive),
+    'profile_seconds': (10, _positive),
+    'stream_urls': (list, _stream_urls),
+    'staging_dir': (None, _optional(_string)),
+    'fallback_dirs': (list, _strings),
+    'low_space_warning_seconds': (300, _positive),
+    'target_mb_per_min': (None, _optional(_positive)),
+    'size_cap_mb': (None, _optional(_positive)),
+    'expected_minutes': (5, _positive),
+    'frame_tap_plugins': (list, _strings),
+    'frame_tap_fps': (5, _positive_int),
+    'frame_tap_height': (360, _positive_int),
+    'window_title': (None, _optional(_string)),
+    'window_class': (None, _optional(_string)),
+    'export_fps': (12, _positive_int),
+    'export_height': (480, _optional(_positive_int)),
+    'export_max_mb': (None, _optional(_positive)),
+    'export_palette': ('global', lambda v: v in ('global', 'segment')),
+    'retention': (dict, _retention),
+}
+
+
+class RecitConfig:
+    """Validated settings; invalid values fall back to their defaults and are reported in `errors`"""
+
+    output_dir: str
+    format: str
+    framerate: Optional[float]
+    resolution: Optional[str]
+    theme: Optional[str]
+    stall_threshold_ms: float
+    profile_seconds: float
+    stream_urls: List[str]
+    staging_dir: Optional[str]
+    fallback_dirs: List[str]
+    low_space_warning_seconds: float
+    target_mb_per_min: Optional[float]
+    size_cap_mb: Optional[float]
+    expected_minutes: float
+    frame_tap_plugins: List[str]
+    frame_tap_fps: int
+    frame_tap_height: int
+    window_title: Optional[str]
+    window_class: Optional[str]
+    export_fps: int
+    export_height: Optional[int]
+    export_max_mb: Optional[float]
+    export_palette: str
+    retention: Dict
+
+    def __init__(self, values: Optional[Dict] = None):
+        values = values or {}
+        self.errors: List[str] = []
+        for key, (default, check) in SCHEMA.items():
+            fallback = default() if callable(default) else default
+            value = values.get(key, fallback)
+            if key in values and not check(value):
+                self.errors.append(f"{key}: invalid value {value!r}, using {fallback!r}")
+                value = fallback
+            setattr(self, key, value)
+
+    @property
+    def size_target(self) -> SizeTarget:
+        return SizeTarget(self.target_mb_per_min, self.size_cap_mb, self.expected_minutes)
+
+    @property
+    def retention_policy(self) -> RetentionPolicy:
+        return RetentionPolicy.from_dict(self.retention)
+
+    def diff(self, other: 'RecitConfig') -> List[str]:
+        """Keys whose values differ from `other`"""
+        return [key for key in SCHEMA if getattr(self, key) != getattr(other, key)]
+
+
+class ConfigStore:
+    """Owns config.json: reads it once, batches changes into debounced atomic writes,
+    and notices edits made by other programs.
+
+    Unknown keys in the file are preserved on write. A write re-reads the file
+    and merges only the pending changes into it, so edits made since the last
+    load survive. If the file can't be read or parsed (say, half-way through an
+    edit), the last good settings stay in effect and nothing is written.
+    """
+
+    def __init__(self, path: Path = CONFIG_DIR / 'config.json', debounce: float = 0.5):
+        self.path = path
+        self.debounce = debounce
+        self.raw: Dict = {}
+        self.config = RecitConfig()
+        self.error: Optional[str] = None
+        self._pending: Dict[str, Any] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple[int, int]] = None
+
+    def _stat_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            info = self.path.stat()
+        except OSError:
+            return None
+        return info.st_mtime_ns, info.st_size
+
+    def _read(self) -> Dict:
+        """The file's contents; {} if it doesn't exist"""
+        try:
+            with open(self.path, 'r') as f:
+                raw = json.load(f)
+        except FileNotFoundError:
+            return {}
+        if not isinstance(raw, dict):
+            raise ValueError("must contain a JSON object")
+        return raw
+
+    def load(self) -> RecitConfig:
+        """Read and validate config.json; on a read error the previous settings are kept"""
+        with self._lock:
+            self._signature = self._stat_signature()
+            try:
+                raw = self._read()
+            except (OSError, ValueError) as e:
+                self.error = f"Could not read {self.path}: {e}"
+                return self.config
+            self.error = None
+            # Changes not yet written win over what is on disk
+            raw.update(self._pending)
+            self.raw = raw
+            self.config = RecitConfig(self.raw)
+            return self.config
+
+    def set(self, key: str, value: Any):
+        """Change a setting; it is written after `debounce` seconds of quiet"""
+        if key not in SCHEMA:
+            raise KeyError(key)
+        with self._lock:
+            if self.raw.get(key) == value and key not in self._pending:
+                return
+            self._pending[key] = value
+            self.raw[key] = value
+            setattr(self.config, key, value)
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Write pending changes now, atomically (temp file, fsync, rename)"""
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            # An edit since the last load is merged here but still needs reloading
+            edited = self._stat_signature() != self._signature
+            try:
+                raw = self._read()
+            except (OSError, ValueError) as e:
+                # Never replace a file we can't read; the changes stay pending
+                self.error = f"Not saving {self.path} until it can be read: {e}"
+                return
+            raw.update(self._pending)
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                temp = self.path.with_name(f'.{self.path.name}.{os.getpid()}.tmp')
+                with open(temp, 'w') as f:
+                    json.dump(raw, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp, self.path)
+                self._pending.clear()
+                self.raw = raw
+                if not edited:
+                    self._signature = self._stat_signature()
+                self.error = None
+            except OSError as e:
+                self.error = f"Could not save {self.path}: {e}"
+
+    def reload_if_changed(self) -> Optional[List[str]]:
+        """Reload if another program changed the file; returns the changed keys"""
+        if self._stat_signature() == self._signature:
+            return None
+        previous = self.config
+        current = self.load()
+        if self.error:
+            return []
+        return current.diff(previous)
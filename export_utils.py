@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+GIF and animated WebP export for finished recordings
+
+The recording is split into segments that are prepared in parallel on a
+process pool: each worker reduces fps and size, drops duplicate frames with
+mpdecimate and writes a small lossless intermediate (plus its own palette for
+per-segment GIF palettes). A final pass joins the segments and quantizes them
+with a two-pass palette (GIF) or encodes them with libwebp (WebP). If a size
+budget is set, the export is retried with progressively cheaper settings
+until it fits. Retries that only change the colors or the WebP quality reuse
+the intermediates and re-run just the final pass (and the per-segment
+palettes); only a new fps or height prepares the segments again.
+
+mpdecimate drops a static tail with nothing after it to carry its time, so
+the final pass places every segment at its known start time rather than
+straight after the previous segment's last kept frame, and the clip ends on
+a copy of the source's last frame at the source's duration.
+"""
+
+import math
+import multiprocessing
+import os
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from trim_utils import probe_stream
+
+# Shortest segment worth handing to its own worker
+MIN_SEGMENT_SECONDS = 4.0
+
+Progress = Callable[[str, int, int], None]
+
+
+class ExportOptions:
+    def __init__(self, fmt: str = 'gif', fps: int = 12, height: Optional[int] = 480,
+                 palette: str = 'global', dedupe: bool = True, max_mb: Optional[float] = None,
+                 colors: int = 256, quality: int = 75, workers: Optional[int] = None):
+        if fmt not in ('gif', 'webp'):
+            raise ValueError(f"Unknown export format '{fmt}'")
+        if palette not in ('global', 'segment'):
+            raise ValueError(f"Unknown palette mode '{palette}'")
+        self.fmt = fmt
+        self.fps = fps
+        self.height = height
+        self.palette = palette
+        self.dedupe = dedupe
+        self.max_mb = max_mb
+        self.colors = colors
+        self.quality = quality
+        self.workers = workers or os.cpu_count() or 2
+
+    def cheaper(self, source_height: int) -> bool:
+        """Step down one notch to shrink the output; False when nothing is left to give"""
+        if self.fmt == 'gif' and self.colors > 64:
+            self.colors //= 2
+        elif self.fmt == 'webp' and self.quality > 40:
+            self.quality -= 15
+        elif self.fps > 6:
+            self.fps = max(6, int(self.fps * 0.75))
+        elif (self.height or source_height) > 240:
+            self.height = max(240, int((self.height or source_height) * 0.75) // 2 * 2)
+        else:
+            return False
+        return True
+
+    def __str__(self):
+        detail = f"{self.colors} colors" if self.fmt == 'gif' else f"q{self.quality}"
+        size = f"{self.height}p" if self.height else "source size"
+        return f"{self.fps} fps • {size} • {detail}"
+
+
+class ExportResult:
+    def __init__(self, output: Path, size_bytes: int, options: ExportOptions, attempts: int, elapsed: float):
+        self.output = output
+        self.size_bytes = size_bytes
+        self.options = options
+        self.attempts = attempts
+        self.elapsed = elapsed
+
+    @property
+    def size_mb(self) -> float:
+        return self.size_bytes / (1024 * 1024)
+
+    def __str__(self):
+        return f"{self.output.name} ({self.size_mb:.1f} MB, {self.options}, {self.elapsed:.1f}s)"
+
+
+def _run(cmd: List[str]):
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+def prepare_segment(source: str, start: float, length: float, output: str, palette: Optional[str],
+                    fps: int, height: Optional[int], dedupe: bool, colors: int,
+                    tail: Optional[str] = None) -> str:
+    """Reduce one segment to a lossless intermediate, and optionally its palette (worker).
+
+    `tail` receives the segment's final frame on its own, for the last segment.
+    """
+    filters = [f'fps={fps}']
+    if height:
+        filters.append(f'scale=-2:{height}:flags=lanczos')
+    if tail:
+        _run(['ffmpeg', '-y', '-ss', f'{max(0.0, start + length - 1 / fps):.3f}', '-i', source,
+              '-vf', ','.join(filters), '-frames:v', '1', '-an', '-c:v', 'ffv1', tail])
+    if dedupe:
+        filters.append('mpdecimate')
+    _run(['ffmpeg', '-y', '-ss', f'{start:.3f}', '-t', f'{length:.3f}', '-i', source,
+          '-vf', ','.join(filters), '-fps_mode', 'vfr', '-an', '-c:v', 'ffv1', output])
+    if palette:
+        segment_palette(output, palette, colors)
+    return output
+
+
+def segment_palette(segment: str, palette: str, colors: int) -> str:
+    """Generate one segment's palette from its intermediate (worker)"""
+    _run(['ffmpeg', '-y', '-i', segment,
+          '-vf', f'palettegen=max_colors={colors}:stats_mode=diff', palette])
+    return palette
+
+
+def _concat_list(segments: List[Path], starts: List[float], directory: Path) -> Path:
+    """Concat demuxer listing that starts each segment at its place in the source"""
+    listing = directory / 'segments.txt'
+    lines = []
+    for i, segment in enumerate(segments):
+        lines.append(f"file '{segment}'\n")
+        if i + 1 < len(segments):
+            # Without it the next segment would follow the last kept frame
+            lines.append(f"duration {starts[i + 1] - starts[i]:.6f}\n")
+    listing.write_text(''.join(lines))
+    return listing
+
+
+def _encode_gif(segments: List[Path], starts: List[float], palettes: List[Path],
+                options: ExportOptions, tmp: Path, output: Path):
+    paletteuse = 'paletteuse=dither=sierra2_4a:diff_mode=rectangle'
+    if options.palette == 'segment':
+        # Each segment keeps its own palette; the GIF encoder writes local color tables.
+        # Segments are put back at their start times and merged in timestamp order.
+        cmd = ['ffmpeg', '-y']
+        graph = []
+        for i, (segment, start) in enumerate(zip(segments, starts)):
+            palette = palettes[min(i, len(palettes) - 1)]
+            cmd += ['-i', str(segment), '-i', str(palette)]
+            graph.append(f'[{2 * i}:v][{2 * i + 1}:v]{paletteuse},'
+                         f'setpts=PTS-STARTPTS+{start:.6f}/TB[p{i}]')
+        labels = ''.join(f'[p{i}]' for i in range(len(segments)))
+        graph.append(f'{labels}interleave=nb_inputs={len(segments)}[out]')
+        _run(cmd + ['-filter_complex', ';'.join(graph), '-map', '[out]', '-fps_mode', 'vfr',
+                    '-loop', '0', str(output)])
+        return
+
+    # Two-pass global palette over the whole (already reduced) clip
+    listing = _concat_list(segments, starts, tmp)
+    palette = tmp / 'palette.png'
+    _run(['ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', str(listing),
+          '-vf', f'palettegen=max_colors={options.colors}:stats_mode=diff', str(palette)])
+    _run(['ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', str(listing), '-i', str(palette),
+          '-lavfi', f'[0:v][1:v]{paletteuse}', '-loop', '0', str(output)])
+
+
+def _encode_webp(segments: List[Path], starts: List[float], options: ExportOptions,
+                 tmp: Path, output: Path):
+    listing = _concat_list(segments, starts, tmp)
+    _run(['ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', str(listing),
+          '-c:v', 'libwebp_anim', '-lossless', '0', '-q:v', str(options.quality),
+          '-compression_level', '4', '-loop', '0', str(output)])
+
+
+def export(source: Path, output: Optional[Path] = None, options: Optional[ExportOptions] = None,
+           progress: Optional[Progress] = None) -> ExportResult:
+    """Export a recording to GIF or animated WebP"""
+    began = time.perf_counter()
+    options = options or ExportOptions()
+    output = output or source.with_suffix(f'.{options.fmt}')
+    info = probe_stream(source)
+    duration = info.duration
+    if duration <= 0:
+        raise ValueError(f"{source.name} has no duration")
+    source_height = info.height
+    if options.height and options.height >= source_height:
+        options.height = None
+
+    count = max(1, min(options.workers, math.ceil(duration / MIN_SEGMENT_SECONDS)))
+    length = duration / count
+    attempts = 0
+    context = multiprocessing.get_context('spawn')
+
+    with tempfile.TemporaryDirectory(prefix='recit-export-') as tmp_dir, \
+            ProcessPoolExecutor(max_workers=count, mp_context=context) as pool:
+        tmp = Path(tmp_dir)
+        segments = [tmp / f'seg{i:03d}.mkv' for i in range(count)]
+        palettes = [tmp / f'pal{i:03d}.png' for i in range(count)]
+        tail = tmp / 'tail.mkv'
+        use_palettes = options.fmt == 'gif' and options.palette == 'segment'
+        # Settings the intermediates (and their palettes) were last made with
+        prepared = None
+        palette_colors = None
+        while True:
+            attempts += 1
+            if prepared != (options.fps, options.height):
+                futures = [
+                    pool.submit(prepare_segment, str(source), i * length, length, str(segments[i]),
+                                str(palettes[i]) if use_palettes else None,
+                                options.fps, options.height, options.dedupe, options.colors,
+                                str(tail) if i == count - 1 else None)
+                    for i in range(count)
+                ]
+                prepared = (options.fps, options.height)
+                palette_colors = options.colors
+            elif use_palettes and palette_colors != options.colors:
+                futures = [
+                    pool.submit(segment_palette, str(segments[i]), str(palettes[i]), options.colors)
+                    for i in range(count)
+                ]
+                palette_colors = options.colors
+            else:
+                futures = []
+            for done, future in enumerate(as_completed(futures), 1):
+                future.result()
+                if progress:
+                    progress("segments", done, count)
+
+            # The tail frame holds the picture until the source's end
+            parts = segments + [tail]
+            starts = [i * length for i in range(count)] + [max(0.0, duration - 1 / options.fps)]
+            if progress:
+                progress("encoding", 0, 1)
+            if options.fmt == 'gif':
+                _encode_gif(parts, starts, palettes, options, tmp, output)
+            else:
+                _encode_webp(parts, starts, options, tmp, output)
+            size = output.stat().st_size
+            if progress:
+                progress("encoding", 1, 1)
+
+            if not options.max_mb or size <= options.max_mb * 1024 * 1024:
+                break
+            if not options.cheaper(source_height):
+                break
+
+    return ExportResult(output, size, options, attempts, time.perf_counter() - began)
+
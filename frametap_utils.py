@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Frame-tap: share decoded frames from the running capture with in-process consumers
+
+The recording ffmpeg gets a second, raw RGB output on stdout. A reader thread
+copies each frame straight from the pipe into a shared-memory ring buffer, and
+consumers get NumPy views onto ring slots without any further copying. The
+writer never waits for consumers, so a slow consumer can't stall the capture;
+instead each consumer has an explicit drop policy and reports its lag.
+
+Plugins are plain modules with a `setup(tap)` function that calls
+`tap.add_consumer(...)`, listed as "module" or "module:function" in the
+`frame_tap_plugins` config option.
+"""
+
+import importlib
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Header: next sequence number, width, height, channels, slot count
+HEADER = struct.Struct('<QIIII')
+HEADER_SIZE = 64
+SLOT_SEQ = struct.Struct('<Q')
+
+# Drop policies for consumers that can't keep up
+POLICY_LATEST = 'latest'          # always jump to the newest frame
+POLICY_SEQUENTIAL = 'sequential'  # every frame in order, dropping any that were overwritten
+
+EMPTY_SLOT = 2 ** 64 - 1
+
+
+class FrameRing:
+    """Fixed-size ring of RGB frames in shared memory"""
+
+    def __init__(self, width: int, height: int, slots: int = 8, channels: int = 3,
+                 name: Optional[str] = None, create: bool = True):
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.slots = slots
+        self.frame_size = width * height * channels
+        self.slot_table = HEADER_SIZE
+        self.data_offset = HEADER_SIZE + SLOT_SEQ.size * slots
+        size = self.data_offset + self.frame_size * slots
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.owner = create
+        if create:
+            HEADER.pack_into(self.shm.buf, 0, 0, width, height, channels, slots)
+            for slot in range(slots):
+                SLOT_SEQ.pack_into(self.shm.buf, self.slot_table + slot * SLOT_SEQ.size, EMPTY_SLOT)
+
+    @classmethod
+    def attach(cls, name: str) -> 'FrameRing':
+        """Open an existing ring, e.g. from another process"""
+        shm = shared_memory.SharedMemory(name=name)
+        _, width, height, channels, slots = HEADER.unpack_from(shm.buf, 0)
+        shm.close()
+        return cls(width, height, slots, channels, name=name, create=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def next_seq(self) -> int:
+        return HEADER.unpack_from(self.shm.buf, 0)[0]
+
+    def slot_seq(self, slot: int) -> int:
+        return SLOT_SEQ.unpack_from(self.shm.buf, self.slot_table + slot * SLOT_SEQ.size)[0]
+
+    def slot_buffer(self, slot: int) -> memoryview:
+        start = self.data_offset + slot * self.frame_size
+        return self.shm.buf[start:start + self.frame_size]
+
+    def begin_write(self) -> memoryview:
+        """Return the buffer for the next frame and invalidate its previous contents"""
+        seq = self.next_seq
+        slot = seq % self.slots
+        SLOT_SEQ.pack_into(self.shm.buf, self.slot_table + slot * SLOT_SEQ.size, EMPTY_SLOT)
+        return self.slot_buffer(slot)
+
+    def commit_write(self):
+        """Publish the frame written into the buffer from begin_write"""
+        seq = self.next_seq
+        SLOT_SEQ.pack_into(self.shm.buf, self.slot_table + (seq % self.slots) * SLOT_SEQ.size, seq)
+        HEADER.pack_into(self.shm.buf, 0, seq + 1, self.width, self.height, self.channels, self.slots)
+
+    def view(self, seq: int):
+        """Zero-copy NumPy view of frame `seq`, or None if it has been overwritten"""
+        slot = seq % self.slots
+        if self.slot_seq(slot) != seq:
+            return None
+        start = self.data_offset + slot * self.frame_size
+        return np.ndarray((self.height, self.width, self.channels), dtype=np.uint8,
+                          buffer=self.shm.buf, offset=start)
+
+    def is_valid(self, seq: int) -> bool:
+        """Whether frame `seq` is still in the ring (check after using a view)"""
+        return self.slot_seq(seq % self.slots) == seq
+
+    def close(self):
+        try:
+            self.shm.close()
+        except BufferError:
+            # A consumer still holds a view; the mapping goes away with it
+            pass
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class ConsumerStats:
+    def __init__(self):
+        self.delivered = 0
+        self.dropped = 0
+        self.torn = 0
+        self.lag = 0
+        self.last_callback_ms = 0.0
+
+    def __str__(self):
+        return (f"{self.delivered} delivered, {self.dropped} dropped, {self.torn} torn, "
+                f"lag {self.lag}, {self.last_callback_ms:.1f} ms/frame")
+
+
+class FrameConsumer:
+    """A consumer thread that feeds ring frames to a callback"""
+
+    def __init__(self, tap: 'FrameTap', name: str, callback: Callable, policy: str = POLICY_LATEST):
+        if policy not in (POLICY_LATEST, POLICY_SEQUENTIAL):
+            raise ValueError(f"Unknown drop policy '{policy}'")
+        self.tap = tap
+        self.name = name
+        self.callback = callback
+        self.policy = policy
+        self.stats = ConsumerStats()
+        self.error: Optional[Exception] = None
+        self._next = 0
+        self._thread = threading.Thread(target=self._run, name=f"recit-tap-{name}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def join(self, timeout: float = 1.0):
+        self._thread.join(timeout)
+
+    def _run(self):
+        ring = self.tap.ring
+        while True:
+            head = self.tap.wait_for_frame(self._next)
+            if head is None:
+                return
+            if self.policy == POLICY_LATEST:
+                seq = head - 1
+            else:
+                # Frames older than the ring's depth have been overwritten
+                seq = max(self._next, head - ring.slots + 1)
+            self.stats.dropped += seq - self._next
+            self.stats.lag = head - 1 - seq
+
+            frame = ring.view(seq)
+            if frame is None:
+                self.stats.dropped += 1
+                self._next = seq + 1
+                continue
+
+            start = time.perf_counter()
+            try:
+                self.callback(frame, seq)
+            except Exception as e:
+                self.error = e
+                return
+            self.stats.last_callback_ms = (time.perf_counter() - start) * 1000
+            if ring.is_valid(seq):
+                self.stats.delivered += 1
+            else:
+                # The writer lapped us while the callback was looking at the view
+                self.stats.torn += 1
+            self._next = seq + 1
+
+
+class FrameTap:
+    """Raw-frame side output of the recording process, shared through a FrameRing"""
+
+    def __init__(self, width: int, height: int, fps: int = 5, slots: int = 8):
+        if np is None:
+            raise RuntimeError("numpy is required for the frame tap (pip install numpy)")
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.ring = FrameRing(width, height, slots)
+        self.consumers: Dict[str, FrameConsumer] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._reader: Optional[threading.Thread] = None
+
+    def output_args(self) -> List[str]:
+        """Extra ffmpeg output writing scaled RGB frames to stdout"""
+        return [
+            '-map', '0:v',
+            '-vf', f'fps={self.fps},scale={self.width}:{self.height}',
+            '-pix_fmt', 'rgb24',
+            '-f', 'rawvideo', 'pipe:1',
+        ]
+
+    def add_consumer(self, name: str, callback: Callable, policy: str = POLICY_LATEST) -> FrameConsumer:
+        """Register `callback(frame, seq)`; frame is a read-only-by-convention NumPy view"""
+        consumer = FrameConsumer(self, name, callback, policy)
+        self.consumers[name] = consumer
+        consumer.start()
+        return consumer
+
+    def attach(self, stream):
+        """Start copying frames from an ffmpeg stdout pipe into the ring"""
+        self._reader = threading.Thread(target=self._read, args=(stream,), name="recit-tap-reader", daemon=True)
+        self._reader.start()
+
+    def _read(self, stream):
+        size = self.ring.frame_size
+        while not self._closed:
+            buffer = self.ring.begin_write()
+            filled = 0
+            while filled < size:
+                count = stream.readinto(buffer[filled:])
+                if not count:
+                    return
+                filled += count
+            with self._cond:
+                self.ring.commit_write()
+                self._cond.notify_all()
+
+    def wait_for_frame(self, seq: int) -> Optional[int]:
+        """Block until frame `seq` exists; returns the ring head, or None once closed"""
+        with self._cond:
+            while not self._closed and self.ring.next_seq <= seq:
+                self._cond.wait(0.5)
+            return None if self._closed else self.ring.next_seq
+
+    def stats(self) -> Dict[str, ConsumerStats]:
+        return {name: consumer.stats for name, consumer in self.consumers.items()}
+
+    def close(self):
+        """Stop consumers and release the shared memory"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for consumer in self.consumers.values():
+            consumer.join()
+        if self._reader is not None:
+            self._reader.join(timeout=1.0)
+        self.ring.close()
+
+
+def load_plugins(tap: FrameTap, plugins: List[str]) -> List[str]:
+    """Import each "module[:function]" plugin and call it with the tap; returns errors"""
+    errors = []
+    for spec in plugins:
+        module_name, _, func_name = spec.partition(':')
+        try:
+            module = importlib.import_module(module_name)
+            getattr(module, func_name or 'setup')(tap)
+        except Exception as e:
+            errors.append(f"{spec}: {e}")
+    return errors
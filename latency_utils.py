@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Event-loop stall watchdog and sampling profiler utilities
+"""
+
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional
+
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def describe_frame(frame) -> str:
+    """Return a short 'function (file:line)' label for a frame"""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def find_handler(frame) -> str:
+    """Find the innermost frame that belongs to the app rather than the framework"""
+    current = frame
+    while current is not None:
+        if os.path.abspath(current.f_code.co_filename).startswith(APP_ROOT + os.sep):
+            return describe_frame(current)
+        current = current.f_back
+    return describe_frame(frame) if frame is not None else "unknown"
+
+
+class StallRecord:
+    def __init__(self, started: float, duration: float, handler: str, stack: List[str]):
+        self.started = started
+        self.duration = duration
+        self.handler = handler
+        self.stack = stack
+        self.timestamp = datetime.now()
+
+    def __str__(self):
+        return f"{self.duration * 1000:.0f} ms stall in {self.handler}"
+
+
+class LoopWatchdog:
+    """Record every event-loop stall above a threshold, with the blocking stack.
+
+    A heartbeat callback is scheduled on the loop every `interval` seconds and a
+    monitor thread checks how long ago it last ran. When the heartbeat is late
+    the monitor grabs the loop thread's current stack, which points at the
+    handler doing the blocking work.
+    """
+
+    def __init__(self, threshold: float = 0.1, interval: float = 0.02,
+                 log_file: Optional[Path] = None, max_records: int = 200):
+        self.threshold = threshold
+        self.interval = interval
+        self.log_file = log_file
+        self.stalls: Deque[StallRecord] = deque(maxlen=max_records)
+        self.on_stall: Optional[Callable[[StallRecord], None]] = None
+
+        self._loop = None
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = 0.0
+        self._pending: Optional[Dict] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, loop):
+        """Start watching; must be called from the loop's own thread"""
+        if self.running:
+            return
+        self._loop = loop
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stop.clear()
+        self._loop.call_later(self.interval, self._beat)
+        self._thread = threading.Thread(target=self._monitor, name="recit-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def _beat(self):
+        """Heartbeat running on the event loop"""
+        now = time.perf_counter()
+        with self._lock:
+            gap = now - self._last_beat - self.interval
+            pending = self._pending
+            self._pending = None
+            self._last_beat = now
+
+        if pending is not None:
+            self._record(StallRecord(pending['started'], max(gap, 0.0), pending['handler'], pending['stack']))
+        elif gap > self.threshold:
+            # Too short for the monitor thread to catch in the act
+            self._record(StallRecord(now - gap, gap, "unknown", []))
+
+        if not self._stop.is_set():
+            self._loop.call_later(self.interval, self._beat)
+
+    def _monitor(self):
+        """Background thread that samples the loop thread while it is stalled"""
+        poll = max(self.interval / 2, 0.005)
+        while not self._stop.wait(poll):
+            now = time.perf_counter()
+            with self._lock:
+                if self._pending is not None:
+                    continue
+                if now - self._last_beat - self.interval <= self.threshold:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is None:
+                    continue
+                self._pending = {
+                    'started': self._last_beat + self.interval,
+                    'handler': find_handler(frame),
+                    'stack': traceback.format_stack(frame),
+                }
+
+    def _record(self, record: StallRecord):
+        self.stalls.append(record)
+        if self.log_file:
+            try:
+                self.log_file.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.log_file, 'a') as f:
+                    f.write(f"[{record.timestamp.isoformat(timespec='milliseconds')}] {record}\n")
+                    f.writelines("    " + line for line in record.stack)
+            except OSError:
+                pass
+        if self.on_stall:
+            self.on_stall(record)
+
+    def worst(self) -> Optional[StallRecord]:
+        """Return the longest stall seen so far"""
+        return max(self.stalls, key=lambda s: s.duration, default=None)
+
+
+class SamplingProfiler:
+    """Sample a thread's stack at a fixed interval and write collapsed stacks.
+
+    The output uses the 'frame;frame;frame count' format understood by
+    flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Dict[str, int] = {}
+        self.output_file: Optional[Path] = None
+        self.on_finished: Optional[Callable[[Path], None]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, output_file: Path, duration: float, thread_id: Optional[int] = None):
+        """Profile `thread_id` (default: the calling thread) for `duration` seconds"""
+        if self.running:
+            return
+        self.samples = {}
+        self.output_file = output_file
+        self._stop.clear()
+        target = thread_id if thread_id is not None else threading.get_ident()
+        self._thread = threading.Thread(target=self._run, args=(target, duration),
+                                        name="recit-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop early; the profile is still written"""
+        self._stop.set()
+
+    def _run(self, thread_id: int, duration: float):
+        deadline = time.perf_counter() + duration
+        while not self._stop.wait(self.interval) and time.perf_counter() < deadline:
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                stack.append(describe_frame(frame))
+                frame = frame.f_back
+            key = ";".join(reversed(stack))
+            self.samples[key] = self.samples.get(key, 0) + 1
+
+        self._write()
+        if self.on_finished and self.output_file:
+            self.on_finished(self.output_file)
+
+    def _write(self):
+        if not self.output_file:
+            return
+        self.output_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.output_file, 'w') as f:
+            for stack, count in sorted(self.samples.items(), key=lambda item: -item[1]):
+                f.write(f"{stack} {count}\n")
@@ -7,14 +7,62 @@ import subprocess
 import re
 from typing import List, Tuple, Dict, Optional
 
+ROTATIONS = ('normal', 'left', 'inverted', 'right')
+
+class Mode:
+    def __init__(self, width: int, height: int, rates: List[float], current_rate: Optional[float] = None,
+                 preferred: bool = False, interlaced: bool = False):
+        self.width = width
+        self.height = height
+        self.rates = rates
+        self.current_rate = current_rate
+        self.preferred = preferred
+        self.interlaced = interlaced
+    
+    @property
+    def is_current(self) -> bool:
+        return self.current_rate is not None
+    
+    def __str__(self):
+        rates = ", ".join(f"{r:g}" for r in self.rates)
+        return f"{self.width}x{self.height}{'i' if self.interlaced else ''} @ {rates} Hz"
+
 class Monitor:
-    def __init__(self, name: str, width: int, height: int, x: int = 0, y: int = 0, is_primary: bool = False):
+    def __init__(self, name: str, width: int, height: int, x: int = 0, y: int = 0, is_primary: bool = False,
+                 rotation: str = 'normal', width_mm: int = 0, height_mm: int = 0):
         self.name = name
         self.width = width
         self.height = height
         self.x = x
         self.y = y
         self.is_primary = is_primary
+        self.rotation = rotation
+        self.width_mm = width_mm
+        self.height_mm = height_mm
+        self.modes: List[Mode] = []
+    
+    @property
+    def current_mode(self) -> Optional[Mode]:
+        return next((mode for mode in self.modes if mode.is_current), None)
+    
+    @property
+    def refresh_rate(self) -> Optional[float]:
+        mode = self.current_mode
+        return mode.current_rate if mode else None
+    
+    @property
+    def scale(self) -> float:
+        """Framebuffer pixels per mode pixel (xrandr --scale); 1.0 when unscaled"""
+        mode = self.current_mode
+        if not mode:
+            return 1.0
+        mode_width = mode.height if self.rotation in ('left', 'right') else mode.width
+        return self.width / mode_width
+    
+    @property
+    def signature(self) -> Tuple:
+        """Changes whenever the monitor's geometry, rotation or refresh rate does"""
+        return (self.name, self.width, self.height, self.x, self.y, self.rotation, self.refresh_rate)
         
     @property
     def resolution(self) -> str:
@@ -40,7 +88,15 @@ class Monitor:
     
     def __str__(self):
         primary = " (Primary)" if self.is_primary else ""
-        return f"{self.name}: {self.resolution} ({self.aspect_ratio_string}){primary}"
+        details = []
+        if self.refresh_rate:
+            details.append(f"{self.refresh_rate:g} Hz")
+        if self.rotation != 'normal':
+            details.append(f"rotated {self.rotation}")
+        if abs(self.scale - 1.0) > 0.01:
+            details.append(f"scaled {self.scale:g}x")
+        extra = f" {', '.join(details)}" if details else ""
+        return f"{self.name}: {self.resolution} ({self.aspect_ratio_string}){extra}{primary}"
 
 class MonitorDetector:
     def __init__(self):
@@ -60,20 +116,25 @@ class MonitorDetector:
             
             output = result.stdout
             
-            # Parse xrandr output
+            # Parse xrandr output; mode lines follow their output's line
+            current = None
             for line in output.split('\n'):
                 if ' connected' in line:
-                    self._parse_monitor_line(line)
+                    current = self._parse_monitor_line(line)
+                elif line.startswith(' ') and current:
+                    self._parse_mode_line(current, line)
+                else:
+                    current = None
                     
         except FileNotFoundError:
             # xrandr not available, use fallback
             self._detect_fallback()
     
-    def _parse_monitor_line(self, line: str):
+    def _parse_monitor_line(self, line: str) -> Optional[Monitor]:
         """Parse a single monitor line from xrandr output"""
         parts = line.split()
         if len(parts) < 3:
-            return
+            return None
             
         monitor_name = parts[0]
         is_primary = 'primary' in line
@@ -86,8 +147,35 @@ class MonitorDetector:
             x = int(resolution_match.group(3))
             y = int(resolution_match.group(4))
             
-            monitor = Monitor(monitor_name, width, height, x, y, is_primary)
+            # Rotation follows the geometry, before the list of supported rotations
+            after = line[resolution_match.end():].split('(')[0].split()
+            rotation = after[0] if after and after[0] in ROTATIONS else 'normal'
+            size_match = re.search(r'(\d+)mm x (\d+)mm', line)
+            width_mm, height_mm = (int(size_match.group(1)), int(size_match.group(2))) if size_match else (0, 0)
+            
+            monitor = Monitor(monitor_name, width, height, x, y, is_primary, rotation, width_mm, height_mm)
             self.monitors.append(monitor)
+            return monitor
+        return None
+    
+    def _parse_mode_line(self, monitor: Monitor, line: str):
+        """Parse a mode line such as '   1920x1080     60.00*+  59.94    50.00'"""
+        match = re.match(r'\s+(\d+)x(\d+)(i?)\s+(.*)$', line)
+        if not match:
+            return
+        rates = []
+        current_rate = None
+        preferred = False
+        # xrandr prints each rate as %6.2f followed by '*' (current) and '+' (preferred)
+        for rate_match in re.finditer(r'(\d+\.\d+)(\*?) ?(\+?)', match.group(4)):
+            rate = float(rate_match.group(1))
+            rates.append(rate)
+            if rate_match.group(2):
+                current_rate = rate
+            if rate_match.group(3):
+                preferred = True
+        monitor.modes.append(Mode(int(match.group(1)), int(match.group(2)), rates,
+                                  current_rate, preferred, bool(match.group(3))))
     
     def _detect_fallback(self):
         """Fallback monitor detection using xdpyinfo"""
@@ -121,6 +209,10 @@ class MonitorDetector:
         # If no primary found, return first monitor
         return self.monitors[0] if self.monitors else None
     
+    def signature(self) -> Tuple:
+        """Topology fingerprint; compare two to see whether anything changed"""
+        return tuple(monitor.signature for monitor in self.monitors)
+    
     def get_total_screen_size(self) -> Tuple[int, int]:
         """Get total screen dimensions across all monitors"""
         if not self.monitors:
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Output directory throughput, free-space and staging utilities
+"""
+
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+
+def free_bytes(directory: Path) -> int:
+    """Free space available to this user on the filesystem holding `directory`"""
+    return shutil.disk_usage(directory).free
+
+
+def measure_write_throughput(directory: Path, size_mb: int = 8) -> float:
+    """Write and fsync a scratch file in `directory`, returning bytes per second"""
+    directory.mkdir(parents=True, exist_ok=True)
+    probe = directory / f'.recit-throughput-{os.getpid()}'
+    block = os.urandom(1024 * 1024)
+    try:
+        start = time.perf_counter()
+        with open(probe, 'wb') as f:
+            for _ in range(size_mb):
+                f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        elapsed = time.perf_counter() - start
+    finally:
+        try:
+            probe.unlink()
+        except OSError:
+            pass
+    return size_mb * 1024 * 1024 / max(elapsed, 1e-6)
+
+
+def default_staging_dir() -> Optional[Path]:
+    """Pick a fast local (preferably tmpfs) directory for staging recordings"""
+    candidates = [os.environ.get('XDG_RUNTIME_DIR'), '/dev/shm']
+    for candidate in candidates:
+        if candidate and os.path.isdir(candidate) and os.access(candidate, os.W_OK):
+            return Path(candidate) / 'recit'
+    return None
+
+
+class BitrateMeter:
+    """Track the live bitrate of a growing file from periodic size samples"""
+
+    def __init__(self, window: float = 10.0):
+        self.window = window
+        self.samples: Deque[Tuple[float, int]] = deque()
+
+    def sample(self, path: Path) -> Optional[float]:
+        """Record the current size of `path` and return bytes per second"""
+        try:
+            size = path.stat().st_size
+        except OSError:
+            return self.bitrate
+        now = time.monotonic()
+        self.samples.append((now, size))
+        while len(self.samples) > 2 and now - self.samples[0][0] > self.window:
+            self.samples.popleft()
+        return self.bitrate
+
+    @property
+    def bitrate(self) -> Optional[float]:
+        if len(self.samples) < 2:
+            return None
+        (t0, s0), (t1, s1) = self.samples[0], self.samples[-1]
+        if t1 <= t0:
+            return None
+        return max(s1 - s0, 0) / (t1 - t0)
+
+    def reset(self):
+        self.samples.clear()
+
+
+class OutputManager:
+    """Decide where recordings are written and keep an eye on free space.
+
+    Write throughput of each directory is measured once (off the UI thread)
+    and cached. If the target directory can't comfortably keep up with the
+    expected bitrate, recordings are staged on a fast local directory and
+    migrated to the target in the background when they finish.
+    """
+
+    def __init__(self, output_dir: str, staging_dir: Optional[str] = None,
+                 fallback_dirs: Optional[List[str]] = None, headroom: float = 4.0,
+                 warn_seconds: float = 300):
+        self.output_dir = Path(output_dir)
+        self.staging_dir = Path(staging_dir) if staging_dir else default_staging_dir()
+        self.fallback_dirs = [Path(d) for d in (fallback_dirs or [])]
+        self.headroom = headroom
+        self.warn_seconds = warn_seconds
+        self.throughput: Dict[Path, float] = {}
+        self.meter = BitrateMeter()
+
+    def measure(self):
+        """Measure write throughput of the output and fallback directories (blocking)"""
+        for directory in [self.output_dir] + self.fallback_dirs:
+            try:
+                self.throughput[directory] = measure_write_throughput(directory)
+            except OSError:
+                pass
+
+    def is_slow(self, directory: Path, bitrate: float) -> bool:
+        """Whether `directory` can't sustain `bitrate` bytes/s with headroom"""
+        throughput = self.throughput.get(directory)
+        return throughput is not None and throughput < bitrate * self.headroom
+
+    def choose_directory(self, bitrate: float) -> Tuple[Path, bool]:
+        """Return (directory to record into, whether it is a staging directory)"""
+        if self.staging_dir and self.is_slow(self.output_dir, bitrate):
+            try:
+                self.staging_dir.mkdir(parents=True, exist_ok=True)
+                if free_bytes(self.staging_dir) > bitrate * self.warn_seconds * 2:
+                    return self.staging_dir, True
+            except OSError:
+                pass
+        return self.output_dir, False
+
+    def time_to_full(self, directory: Path, bitrate: Optional[float]) -> Optional[float]:
+        """Seconds until `directory` fills at `bitrate` bytes/s"""
+        if not bitrate:
+            return None
+        try:
+            return free_bytes(directory) / bitrate
+        except OSError:
+            return None
+
+    def next_fallback(self, current: Path, bitrate: float) -> Optional[Path]:
+        """First fallback directory with comfortably more room than the warning window.
+
+        A recording running out of staging space goes straight to the output
+        directory: a slow disk drops frames, a full one loses the recording.
+        """
+        candidates = list(self.fallback_dirs)
+        if current == self.staging_dir:
+            candidates.insert(0, self.output_dir)
+        for directory in candidates:
+            if directory == current:
+                continue
+            try:
+                directory.mkdir(parents=True, exist_ok=True)
+                if free_bytes(directory) > bitrate * self.warn_seconds * 2:
+                    return directory
+            except OSError:
+                continue
+        return None
+
+    def migrate(self, source: Path, on_done: Callable[[Optional[Path], Optional[Exception]], None]):
+        """Move a finished recording to the output directory in a background thread"""
+        def run():
+            try:
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+                target = self.output_dir / source.name
+                shutil.move(str(source), str(target))
+                on_done(target, None)
+            except Exception as e:
+                on_done(None, e)
+
+        thread = threading.Thread(target=run, name="recit-migrate", daemon=True)
+        thread.start()
+        return thread
+
+
+def format_duration(seconds: float) -> str:
+    """Format seconds as a short human-readable duration"""
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f} h"
@@ -4,19 +4,47 @@ Recit - A Beautiful Terminal Screen Recorder
 Record your screen with style using a modern TUI interface.
 """
 
-from textual.app import App, ComposeResult
+from textual.app import App, ComposeResult, InvalidThemeError, SystemCommand
 from textual.containers import Container, Horizontal, Vertical
-from textual.widgets import Button, Footer, Header, Static, Label
+from textual.widgets import Button, Footer, Header, Static, Label, Input
+from textual.screen import ModalScreen
 from textual.reactive import reactive
 from textual.theme import Theme
 import subprocess
 import os
+import sys
+import argparse
 import signal
 import time
 from pathlib import Path
 from datetime import datetime
 import threading
-import json
+import asyncio
+
+from latency_utils import LoopWatchdog, SamplingProfiler
+from stream_utils import build_tee_output, latency_encoder_args
+from output_utils import OutputManager, format_duration
+from bitrate_utils import describe_result, plan_crf
+from frametap_utils import FrameTap, load_plugins
+from screenshot_utils import ScreenshotStore
+from retention_utils import RetentionEngine, summarize
+from config_utils import CONFIG_DIR, ConfigStore
+from export_utils import ExportOptions, export
+from analysis_utils import analyze, save_report
+from trim_utils import latest_recording, parse_time, split, split_points, trim
+from monitor_utils import MonitorDetector
+from capture_utils import CapturePlanner
+from window_utils import (
+    WindowTracker, clamp_geometry, crop_commands, find_window,
+    select_window_by_click, window_filter, window_geometry
+)
+
+# Bytes per second assumed before any recording has been measured; erring high
+# stages a recording unnecessarily, erring low records onto a disk that can't keep up
+EXPECTED_BITRATE = 8.0 * 1024 * 1024 / 8
+
+# Encoder for file-only recordings
+RECORDING_ENCODER_ARGS = ['-c:v', 'libvpx-vp9', '-crf', '32', '-b:v', '0']
 
 # Base2Tone Evening Theme
 BASE2TONE_EVENING = Theme(
@@ -252,103 +280,228 @@ BASE2TONE_MEADOW = Theme(
     }
 )
 
+CUSTOM_THEMES = {
+    theme.name: theme for theme in (
+        BASE2TONE_EVENING, BASE2TONE_SEA, BASE2TONE_FOREST, BASE2TONE_FIELD, BASE2TONE_DESERT,
+        BASE2TONE_DRAWBRIDGE, BASE2TONE_EARTH, BASE2TONE_LAKE, BASE2TONE_MEADOW,
+    )
+}
+
+class TrimScreen(ModalScreen):
+    """Ask for trim or split times for a recording."""
+    
+    DEFAULT_CSS = """
+    TrimScreen {
+        align: center middle;
+    }
+    
+    #trim-dialog {
+        width: 60;
+        height: auto;
+        border: round $primary;
+        background: $surface;
+        padding: 1 2;
+    }
+    
+    #trim-dialog Input {
+        margin-bottom: 1;
+    }
+    """
+    
+    BINDINGS = [("escape", "cancel", "Cancel")]
+    
+    def __init__(self, recording):
+        super().__init__()
+        self.recording = recording
+    
+    def compose(self) -> ComposeResult:
+        with Vertical(id="trim-dialog"):
+            yield Static(f"✂️  {self.recording.name}", classes="section-title")
+            yield Input(placeholder="Start (e.g. 5 or 0:05)", id="trim-start")
+            yield Input(placeholder="End (e.g. -3 for 3s before the end)", id="trim-end")
+            yield Input(placeholder="Or split at (e.g. 1:00, 2:30)", id="split-at")
+            with Horizontal(classes="button-row"):
+                yield Button("Trim", id="trim-apply", classes="record-button")
+                yield Button("Split", id="split-apply", classes="utility-button")
+                yield Button("Cancel", id="trim-cancel", classes="exit-button")
+    
+    def on_button_pressed(self, event: Button.Pressed) -> None:
+        event.stop()
+        if event.button.id == "trim-cancel":
+            self.dismiss(None)
+            return
+        try:
+            if event.button.id == "trim-apply":
+                start = self.query_one("#trim-start").value or "0"
+                end = self.query_one("#trim-end").value
+                self.dismiss(('trim', parse_time(start), parse_time(end) if end else None))
+            elif event.button.id == "split-apply":
+                points = split_points(self.query_one("#split-at").value)
+                if points:
+                    self.dismiss(('split', points))
+        except ValueError:
+            self.notify("Times look like 5, 1:30 or -3", severity="error")
+    
+    def action_cancel(self):
+        self.dismiss(None)
+
 class SimpleRecorderApp(App):
     """A simple terminal GUI for screen recording."""
     
     ENABLE_COMMAND_PALETTE = True
     
     def __init__(self):
-        self.config_dir = Path.home() / '.config' / 'recit'
+        self.started_at = time.perf_counter()
+        self.startup_times = {}
+        self.config_dir = CONFIG_DIR
         self.config_file = self.config_dir / 'config.json'
         
-        # Load theme before super().__init__()
-        saved_theme = None
-        try:
-            if self.config_file.exists():
-                with open(self.config_file, 'r') as f:
-                    config = json.load(f)
-                    saved_theme = config.get('theme')
-        except:
-            pass
+        # Read config.json once, before super().__init__()
+        self.config_store = ConfigStore(self.config_file)
+        saved_theme = self.config_store.load().theme
+        
+        # Only the saved theme is needed for the first frame; the rest are
+        # registered right after it is painted
+        self.custom_themes_loaded = False
         
         super().__init__()
         
-        # Register custom themes FIRST
-        self.register_theme(BASE2TONE_EVENING)
-        self.register_theme(BASE2TONE_SEA)
-        self.register_theme(BASE2TONE_FOREST)
-        self.register_theme(BASE2TONE_FIELD)
-        self.register_theme(BASE2TONE_DESERT)
-        self.register_theme(BASE2TONE_DRAWBRIDGE)
-        self.register_theme(BASE2TONE_EARTH)
-        self.register_theme(BASE2TONE_LAKE)
-        self.register_theme(BASE2TONE_MEADOW)
-        
-        # Apply saved theme after registration
-        if saved_theme:
-            self.theme = saved_theme
+        if saved_theme in CUSTOM_THEMES:
+            self.register_theme(CUSTOM_THEMES[saved_theme])
+        self.theme_error = self.use_theme(saved_theme) if saved_theme else None
         
         self.recording_process = None
         self.recording_start_time = None
+        self.recording_segments = []
+        self.recording_staged = False
+        self.last_bitrate = None
+        self.rollover_note = ""
+        self.preparing_recording = False
+        self.crf_plan = None
+        self.target_bias = 1.0
+        self.frame_tap = None
+        self.capture_size = None
+        self.window_tracker = None
+        self.watchdog = None
+        self.profiler = SamplingProfiler()
+        self.retention_engine = None
+        # Config keys changed while recording; a recording keeps the settings it started with
+        self.pending_config_changes = set()
+        self.capture_plan = None
+        self.planner = CapturePlanner(RECORDING_ENCODER_ARGS)
+        self.planning = False
         
         # Load main config
         self.load_main_config()
+        self.create_output_manager()
         
-        self.monitor_info = self.detect_monitor()
+        # Filled in by a worker after the first frame
+        self.monitor_info = None
     
     def load_main_config(self):
-        """Load recording settings from config.json."""
-        try:
-            if self.config_file.exists():
-                with open(self.config_file, 'r') as f:
-                    config = json.load(f)
-                    self.output_dir = config.get('output_dir', str(Path.home() / 'Videos' / 'Recordings'))
-                    self.format = config.get('format', 'webm')
-                    self.framerate = config.get('framerate', 30)
-                    self.resolution = config.get('resolution', '720p')
-            else:
-                self.output_dir = str(Path.home() / 'Videos' / 'Recordings')
-                self.format = 'webm'
-                self.framerate = 30
-                self.resolution = '720p'
-        except:
-            self.output_dir = str(Path.home() / 'Videos' / 'Recordings')
-            self.format = 'webm'
-            self.framerate = 30
-            self.resolution = '720p'
+        """Apply recording settings from the validated config."""
+        self.apply_config(self.config_store.config)
+    
+    def apply_config(self, config):
+        """Copy settings from a RecitConfig onto the app."""
+        self.output_dir = config.output_dir
+        self.format = config.format
+        self.framerate = config.framerate
+        self.resolution = config.resolution
+        self.stall_threshold_ms = config.stall_threshold_ms
+        self.profile_seconds = config.profile_seconds
+        self.stream_urls = config.stream_urls
+        self.staging_dir = config.staging_dir
+        self.fallback_dirs = config.fallback_dirs
+        self.low_space_warning_seconds = config.low_space_warning_seconds
+        self.size_target = config.size_target
+        self.frame_tap_plugins = config.frame_tap_plugins
+        self.frame_tap_fps = config.frame_tap_fps
+        self.frame_tap_height = config.frame_tap_height
+        self.window_title = config.window_title
+        self.window_class = config.window_class
+        self.export_fps = config.export_fps
+        self.export_height = config.export_height
+        self.export_max_mb = config.export_max_mb
+        self.export_palette = config.export_palette
+        self.retention_policy = config.retention_policy
+    
+    def create_output_manager(self):
+        """Build the output manager and screenshot store for output_dir."""
+        self.output_manager = OutputManager(
+            self.output_dir,
+            staging_dir=self.staging_dir,
+            fallback_dirs=self.fallback_dirs,
+            warn_seconds=self.low_space_warning_seconds
+        )
+        self.screenshot_store = ScreenshotStore(self.output_dir)
+    
+    def check_config_changes(self):
+        """Hot-reload config.json after it is edited outside the app."""
+        changed = self.config_store.reload_if_changed()
+        if changed is None:
+            return
+        config = self.config_store.config
+        if self.config_store.error or config.errors:
+            self.report_config_problems()
+        if not changed:
+            return
         
-        # Try to use the proper monitor detector
+        if 'theme' in changed and config.theme:
+            self.theme_error = self.use_theme(config.theme)
+            if self.theme_error:
+                self.report_config_problems()
+        if self.watchdog:
+            self.watchdog.threshold = config.stall_threshold_ms / 1000
+        busy = self.recording or self.preparing_recording
+        if busy:
+            # Segment restarts and rollovers re-read these; apply them when this recording is over
+            self.pending_config_changes.update(changed)
+        else:
+            self.apply_config_changes(changed)
+        
+        when = "next recording" if busy else "now"
+        self.query_one("#status").update(f"⚙️ Reloaded {', '.join(changed)} (applies {when})")
+        if not busy:
+            self.set_timer(4.0, lambda: self.query_one("#status").update("Ready to record"))
+    
+    def apply_config_changes(self, changed):
+        """Apply reloaded settings while no recording is running."""
+        self.apply_config(self.config_store.config)
+        output_keys = {'output_dir', 'staging_dir', 'fallback_dirs', 'low_space_warning_seconds'}
+        if output_keys & set(changed):
+            self.create_output_manager()
+            self.run_worker(self.output_manager.measure, thread=True)
+        if {'framerate', 'resolution'} & set(changed):
+            self.check_capture_plan()
+        self.update_output_info()
+    
+    def use_theme(self, name):
+        """Switch to a theme by name; returns a problem description if it doesn't exist."""
         try:
-            import sys
-            import os
-            sys.path.insert(0, os.path.dirname(__file__))
-            from monitor_utils import MonitorDetector
-            detector = MonitorDetector()
-            if detector.monitors:
-                monitor = detector.get_primary_monitor()
-                if monitor:
-                    self.monitor_info = {
-                        'resolution': monitor.resolution,
-                        'width': monitor.width,
-                        'height': monitor.height,
-                        'aspect': monitor.aspect_ratio_string
-                    }
-        except:
-            pass  # Use fallback detection
+            self.theme = name
+        except InvalidThemeError:
+            return f"theme: unknown theme {name!r}, using {self.theme}"
+        return None
+    
+    def report_config_problems(self):
+        """Show config.json read or validation errors in the status line."""
+        problems = [self.config_store.error] if self.config_store.error else []
+        problems += self.config_store.config.errors
+        if self.theme_error:
+            problems.append(self.theme_error)
+        self.query_one("#status").update("⚠️ config.json: " + " • ".join(problems))
+    
+    def register_custom_themes(self):
+        """Register the Base2Tone themes not needed for the first frame."""
+        for name, theme in CUSTOM_THEMES.items():
+            if name not in self.available_themes:
+                self.register_theme(theme)
+        self.custom_themes_loaded = True
     
     def save_theme(self):
-        """Save current theme to config."""
-        try:
-            self.config_dir.mkdir(parents=True, exist_ok=True)
-            config = {}
-            if self.config_file.exists():
-                with open(self.config_file, 'r') as f:
-                    config = json.load(f)
-            config['theme'] = self.theme
-            with open(self.config_file, 'w') as f:
-                json.dump(config, f, indent=2)
-        except:
-            pass
+        """Save current theme to config (batched into one write)."""
+        self.config_store.set('theme', self.theme)
     
     def watch_theme(self, theme: str) -> None:
         """Called when theme changes."""
@@ -468,6 +621,8 @@ class SimpleRecorderApp(App):
     BINDINGS = [
         ("r", "record_full", "Record"),
         ("a", "record_area", "Area"),
+        ("w", "record_window", "Window"),
+        ("t", "trim", "Trim"),
         ("s", "stop", "Stop"),
         ("m", "detect_monitor", "Monitor"),
         ("q", "quit", "Quit"),
@@ -476,58 +631,149 @@ class SimpleRecorderApp(App):
     
     recording = reactive(False)
     
-    def detect_monitor(self):
-        """Detect monitor information."""
+    def find_primary_monitor(self):
+        """Detect the primary Monitor, or None (runs xrandr, so call it off the UI thread)."""
         try:
-            result = subprocess.run(['xrandr', '--query'], capture_output=True, text=True)
-            if result.returncode == 0:
-                for line in result.stdout.split('\n'):
-                    if ' connected' in line and ('primary' in line or '*' in line):
-                        # Extract resolution
-                        import re
-                        match = re.search(r'(\d+)x(\d+)', line)
-                        if match:
-                            width, height = int(match.group(1)), int(match.group(2))
-                            aspect = width / height
-                            if abs(aspect - 16/9) < 0.1:
-                                aspect_str = "16:9"
-                            elif abs(aspect - 21/9) < 0.1:
-                                aspect_str = "21:9" 
-                            elif abs(aspect - 32/9) < 0.1:
-                                aspect_str = "32:9"
-                            else:
-                                aspect_str = f"{aspect:.2f}:1"
-                            
-                            return {
-                                'resolution': f"{width}x{height}",
-                                'width': width,
-                                'height': height,
-                                'aspect': aspect_str
-                            }
-        except:
-            pass
+            return MonitorDetector().get_primary_monitor()
+        except (OSError, ValueError):
+            return None
+    
+    def describe_monitor(self, monitor):
+        """Display info shown in the panel, with a fallback when detection failed."""
+        if monitor:
+            return {
+                'resolution': monitor.resolution,
+                'width': monitor.width,
+                'height': monitor.height,
+                'aspect': monitor.aspect_ratio_string,
+                'refresh': monitor.refresh_rate
+            }
         
         # Fallback
         return {
             'resolution': '1920x1080',
             'width': 1920,
             'height': 1080,
-            'aspect': '16:9'
+            'aspect': '16:9',
+            'refresh': None
         }
     
+    def detect_monitor(self):
+        """Detect monitor information."""
+        return self.describe_monitor(self.find_primary_monitor())
+    
+    def display_info(self):
+        """Monitor info, detecting it now if the startup worker hasn't finished."""
+        if self.monitor_info is None:
+            self.monitor_info = self.detect_monitor()
+        return self.monitor_info
+    
+    def detect_display(self):
+        """Detect the display in a worker and fill in the placeholders, then plan capture."""
+        monitor = self.find_primary_monitor()
+        self.call_from_thread(self.display_detected, self.describe_monitor(monitor))
+        if monitor and self.needs_capture_plan():
+            self.planning = True
+            self.plan_capture(monitor)
+    
+    def display_detected(self, info):
+        """Show detected display info and size estimates."""
+        self.monitor_info = info
+        refresh = f" • {info['refresh']:g} Hz" if info['refresh'] else ""
+        self.query_one("#resolution").update(f"{info['resolution']} • {info['aspect']}{refresh}")
+        self.update_output_info()
+        self.call_after_refresh(self.mark_startup, 'interactive')
+    
+    def needs_capture_plan(self):
+        """Whether framerate or resolution is left to the capture planner."""
+        return self.framerate is None or self.resolution is None
+    
+    def capture_settings(self):
+        """Framerate and full-screen output height: from config, else from the capture plan."""
+        plan = self.capture_plan
+        fps = self.framerate or (plan.fps if plan else 30)
+        height = int(self.resolution.rstrip('p')) if self.resolution else (plan.height if plan else 720)
+        return fps, height
+    
+    def plan_capture(self, monitor, reason=None):
+        """Measure the encoder and choose framerate and size (worker thread)."""
+        # Measure the encoder recordings will actually use
+        self.planner.encoder_args = latency_encoder_args(30) if self.stream_urls else RECORDING_ENCODER_ARGS
+        try:
+            plan = self.planner.plan(monitor, reason)
+        except (OSError, subprocess.CalledProcessError) as e:
+            self.call_from_thread(self.query_one("#status").update, f"⚠️ Capture planning failed: {e}")
+            return
+        finally:
+            self.planning = False
+        self.call_from_thread(self.capture_planned, plan)
+    
+    def capture_planned(self, plan):
+        """Use a new capture plan and explain it."""
+        self.capture_plan = plan
+        self.update_output_info()
+        if not self.recording:
+            self.query_one("#status").update(f"🧭 {plan}: {plan.explain()}")
+            self.set_timer(8.0, lambda: self.query_one("#status").update("Ready to record"))
+    
+    def check_capture_plan(self):
+        """Periodically re-plan capture if the displays or the load changed."""
+        if self.recording or self.planning or not self.needs_capture_plan():
+            return
+        self.planning = True
+        
+        def work():
+            monitor = self.find_primary_monitor()
+            reason = self.planner.replan_reason(self.capture_plan, monitor)
+            if not reason:
+                self.planning = False
+                return
+            if monitor.signature != getattr(self.capture_plan, 'signature', None):
+                self.call_from_thread(self.display_detected, self.describe_monitor(monitor))
+            self.plan_capture(monitor, reason)
+        
+        self.run_worker(work, thread=True)
+    
+    def explain_capture_plan(self):
+        """Show why the capture plan was chosen."""
+        if not self.capture_plan:
+            self.query_one("#status").update("No capture plan (framerate and resolution are set in config.json)")
+        else:
+            self.query_one("#status").update(f"🧭 {self.capture_plan}: {self.capture_plan.explain()}")
+    
+    def settings_text(self):
+        fps, height = self.capture_settings()
+        auto = " (auto)" if self.needs_capture_plan() else ""
+        return f"{self.format.upper()} • {height}p • {fps:g} FPS{auto}"
+    
+    def mark_startup(self, milestone):
+        """Record a startup milestone; log them all once the app is interactive."""
+        self.startup_times[milestone] = time.perf_counter() - self.started_at
+        if milestone != 'interactive':
+            return
+        first_paint = self.startup_times.get('first_paint', 0) * 1000
+        interactive = self.startup_times['interactive'] * 1000
+        try:
+            self.config_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.config_dir / 'startup.log', 'a') as f:
+                f.write(f"{datetime.now().isoformat(timespec='seconds')} "
+                        f"first_paint={first_paint:.1f}ms interactive={interactive:.1f}ms\n")
+        except OSError:
+            pass
+    
     def compose(self) -> ComposeResult:
         """Create the layout."""
         with Container():
             with Horizontal(classes="info-panel"):
                 with Vertical(classes="info-column"):
                     yield Static("Display", classes="section-title")
-                    yield Static(f"{self.monitor_info['resolution']} • {self.monitor_info['aspect']}", id="resolution", classes="info-line")
-                    yield Static("", id="output-info", classes="info-line")
+                    yield Static("Detecting…", id="resolution", classes="info-line")
+                    yield Static("Output: …", id="output-info", classes="info-line")
                 
                 with Vertical(classes="info-column"):
                     yield Static("Settings", classes="section-title")
-                    yield Static(f"{self.format.upper()} • {self.resolution} • {self.framerate} FPS", id="settings", classes="info-line")
-                    yield Static("", id="file-info", classes="info-line")
+                    yield Static(self.settings_text(), id="settings", classes="info-line")
+                    yield Static("Estimating…", id="file-info", classes="info-line")
             
             with Container(classes="status"):
                 yield Static("Ready to record", id="status")
@@ -536,6 +782,7 @@ class SimpleRecorderApp(App):
                 with Horizontal(classes="button-row"):
                     yield Button("🎬 Full Screen", id="record-full", classes="record-button")
                     yield Button("🎯 Select Area", id="record-area", classes="record-button") 
+                    yield Button("🪟 Window", id="record-window", classes="record-button")
                     yield Button("⏹️  Stop", id="stop", classes="stop-button", disabled=True)
                 
                 with Horizontal(classes="button-row"):
@@ -548,11 +795,87 @@ class SimpleRecorderApp(App):
     
     def on_mount(self) -> None:
         """Called when app starts."""
-        self.update_output_info()
+        self.call_after_refresh(self.mark_startup, 'first_paint')
+        self.call_after_refresh(self.register_custom_themes)
+        self.start_watchdog()
+        self.run_worker(self.detect_display, thread=True)
+        if self.config_store.error or self.config_store.config.errors or self.theme_error:
+            self.report_config_problems()
+        self.set_interval(2.0, self.check_config_changes)
+        self.set_interval(30.0, self.check_capture_plan)
+        # Measuring disk throughput can take seconds on network mounts
+        self.run_worker(self.output_manager.measure, thread=True)
+    
+    def on_unmount(self) -> None:
+        """Called when app shuts down."""
+        if self.watchdog:
+            self.watchdog.stop()
+        self.profiler.stop()
+        if self.retention_engine:
+            self.retention_engine.stop()
+        self.config_store.flush()
+    
+    def start_watchdog(self):
+        """Start recording event-loop stalls to stalls.log."""
+        self.watchdog = LoopWatchdog(
+            threshold=self.stall_threshold_ms / 1000,
+            log_file=self.config_dir / 'stalls.log'
+        )
+        self.watchdog.start(asyncio.get_running_loop())
+    
+    def get_system_commands(self, screen):
+        """Add profiling commands to the command palette."""
+        yield from super().get_system_commands(screen)
+        if self.profiler.running:
+            yield SystemCommand("Stop profiler", "Stop sampling and write the profile now", self.profiler.stop)
+        else:
+            yield SystemCommand(
+                "Start profiler",
+                f"Sample the UI thread for {self.profile_seconds}s and write a profile file",
+                self.start_profiler
+            )
+        if self.frame_tap:
+            yield SystemCommand("Show frame-tap stats", "Show delivered, dropped and lag per frame consumer", self.show_frame_tap_stats)
+        yield SystemCommand("Export GIF", "Export the latest recording as an optimized GIF", lambda: self.export_latest('gif'))
+        yield SystemCommand("Export WebP", "Export the latest recording as an animated WebP", lambda: self.export_latest('webp'))
+        if self.retention_engine:
+            yield SystemCommand("Stop retention", "Stop after the current file; the next run resumes", self.retention_engine.stop)
+        elif self.retention_policy.enabled:
+            yield SystemCommand("Retention dry run", "Show what the retention policy would compact, evict and convert", lambda: self.run_retention(dry_run=True))
+            yield SystemCommand("Run retention", "Compact, evict and convert files in the background", self.run_retention)
+        yield SystemCommand("Find similar screenshots", "List screenshots that look like the latest one", self.show_similar_screenshots)
+        yield SystemCommand("Screenshot storage", "Show screenshots stored and space saved by deduplication", self.show_screenshot_stats)
+        if self.capture_plan:
+            yield SystemCommand("Explain capture plan", "Show why this framerate and size were chosen", self.explain_capture_plan)
+        yield SystemCommand("Show UI stalls", "Show the slowest event-loop stalls seen so far", self.show_stalls)
+    
+    def start_profiler(self):
+        """Start the sampling profiler on the UI thread."""
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_file = self.config_dir / 'profiles' / f'profile_{timestamp}.txt'
+        self.profiler.on_finished = lambda path: self.call_from_thread(
+            self.query_one("#status").update, f"📈 Profile saved: {path}"
+        )
+        self.profiler.start(output_file, self.profile_seconds)
+        self.query_one("#status").update(f"📈 Profiling for {self.profile_seconds}s...")
+    
+    def show_stalls(self):
+        """Show the worst recorded event-loop stalls."""
+        if not self.watchdog or not self.watchdog.stalls:
+            self.query_one("#status").update("No UI stalls recorded")
+        else:
+            worst = sorted(self.watchdog.stalls, key=lambda s: s.duration, reverse=True)[:3]
+            self.query_one("#status").update(
+                f"{len(self.watchdog.stalls)} stalls • worst: " + " • ".join(str(s) for s in worst)
+            )
+        self.set_timer(5.0, lambda: self.query_one("#status").update("Ready to record"))
     
     def update_output_info(self):
         """Update the output information display."""
-        target_height = 720
+        self.query_one("#settings").update(self.settings_text())
+        if self.monitor_info is None:
+            return
+        _, target_height = self.capture_settings()
         aspect_ratio = self.monitor_info['width'] / self.monitor_info['height']
         output_width = int(target_height * aspect_ratio)
         
@@ -575,6 +898,8 @@ class SimpleRecorderApp(App):
             self.start_recording(area_select=False)
         elif event.button.id == "record-area":
             self.start_recording(area_select=True)
+        elif event.button.id == "record-window":
+            self.start_recording(window_select=True)
         elif event.button.id == "stop":
             self.stop_recording()
         elif event.button.id == "open-folder":
@@ -586,20 +911,30 @@ class SimpleRecorderApp(App):
         elif event.button.id == "exit":
             self.exit()
     
-    def start_recording(self, area_select=False):
+    def start_recording(self, area_select=False, window_select=False):
         """Start recording."""
-        if self.recording:
+        if self.recording or self.preparing_recording:
             return
+        self.window_tracker = None
+        if self.pending_config_changes:
+            changed = self.pending_config_changes
+            self.pending_config_changes = set()
+            self.apply_config_changes(changed)
         
-        # Create output directory
-        Path(self.output_dir).mkdir(parents=True, exist_ok=True)
+        # Record into the output directory, or a fast staging directory if it can't keep up
+        record_dir, self.recording_staged = self.output_manager.choose_directory(self.expected_bitrate())
+        record_dir.mkdir(parents=True, exist_ok=True)
         
         # Generate filename
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_file = Path(self.output_dir) / f'recording_{timestamp}.webm'
+        output_file = record_dir / f'recording_{timestamp}.webm'
         
         # Build command
+        fps, height = self.capture_settings()
+        rate = f'{fps:g}'
         cmd = ['ffmpeg', '-y']
+        input_args = []
+        filter_args = []
         
         if area_select:
             self.query_one("#status").update("Select area with mouse, then return to this window...")
@@ -613,12 +948,14 @@ class SimpleRecorderApp(App):
                     coords = result.stdout.strip().split(',')
                     if len(coords) == 4:
                         x, y, w, h = map(int, coords)
-                        cmd.extend([
+                        self.capture_size = (w, h)
+                        input_args = [
                             '-f', 'x11grab',
+                            '-framerate', rate,
                             '-s', f'{w}x{h}',
                             '-i', f':0.0+{x},{y}',
-                            '-r', '30'
-                        ])
+                            '-r', rate
+                        ]
                     else:
                         self.query_one("#status").update("Area selection failed")
                         return
@@ -628,51 +965,217 @@ class SimpleRecorderApp(App):
             except:
                 self.query_one("#status").update("Area selection failed (is slop installed?)")
                 return
+        elif window_select:
+            capture = self.prepare_window_capture()
+            if not capture:
+                return
+            input_args, filter_args = capture
         else:
             # Full screen
-            cmd.extend([
+            display = self.display_info()
+            self.capture_size = (display['width'], display['height'])
+            input_args = [
                 '-f', 'x11grab',
+                '-framerate', rate,
                 '-i', ':0.0',
-                '-r', '30'
-            ])
+                '-r', rate
+            ]
         
-        # Add scaling for 720p with aspect ratio preservation (full screen only)
-        if not area_select:
-            cmd.extend(['-vf', 'scale=-1:720'])
+        # Add scaling to the planned height with aspect ratio preservation (full screen only)
+        if not area_select and not window_select:
+            filter_args = ['-vf', f'scale=-2:{height}']
         
-        # WebM encoding
-        cmd.extend(['-c:v', 'libvpx-vp9', '-crf', '32', '-b:v', '0'])
-        cmd.append(str(output_file))
+        cmd.extend(input_args + filter_args)
+        self.crf_plan = None
         
-        try:
-            self.recording_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                preexec_fn=os.setsid
+        if self.stream_urls:
+            # One low-latency encode feeds the file and every stream via the tee muxer
+            output_file = output_file.with_suffix('.mkv')
+            cmd.extend(latency_encoder_args(round(fps)))
+            if self.size_target.enabled:
+                bits = str(int(self.size_target.bitrate * 8))
+                cmd.extend(['-maxrate', bits, '-bufsize', bits])
+        elif self.size_target.enabled:
+            # Choose a CRF from probe encodes of the current content, off the UI thread
+            self.preparing_recording = True
+            self.query_one("#status").update(f"🎯 Probing content for {self.size_target}...")
+            self.run_worker(
+                lambda: self.plan_target_recording(cmd, input_args, filter_args, output_file),
+                thread=True
             )
+            return
+        else:
+            # WebM encoding
+            cmd.extend(RECORDING_ENCODER_ARGS)
+        
+        self.begin_recording(cmd, output_file)
+    
+    def expected_bitrate(self):
+        """Bytes per second the next recording is likely to need."""
+        if self.size_target.enabled:
+            return self.size_target.bitrate
+        # The live meter still holds the end of the last recording until the next one starts
+        return self.output_manager.meter.bitrate or self.last_bitrate or EXPECTED_BITRATE
+    
+    def prepare_window_capture(self):
+        """Pick a window and return (input_args, filter_args) that follow it."""
+        try:
+            if self.window_title or self.window_class:
+                window_id = find_window(self.window_title, self.window_class)
+                if not window_id:
+                    self.query_one("#status").update("No window matches window_title/window_class")
+                    return None
+            else:
+                self.query_one("#status").update("Click the window to record...")
+                self.refresh()
+                window_id = select_window_by_click()
+                if not window_id:
+                    self.query_one("#status").update("Window selection cancelled")
+                    return None
+            screen = window_geometry('root')
+            geometry = window_geometry(window_id)
+        except (OSError, subprocess.TimeoutExpired):
+            self.query_one("#status").update("Window selection failed (are xwininfo and xdotool installed?)")
+            return None
+        if not screen or not geometry:
+            self.query_one("#status").update("Could not read window geometry")
+            return None
+        
+        # Grab the screen, crop to the window and letterbox into its starting size,
+        # so moves and resizes only update the crop instead of restarting the encoder
+        screen_size = (screen[2], screen[3])
+        geometry = clamp_geometry(geometry, screen_size)
+        output_size = (geometry[2], geometry[3])
+        self.capture_size = screen_size
+        self.window_tracker = WindowTracker(window_id, screen_size, geometry, self.on_window_changed)
+        rate = f'{self.capture_settings()[0]:g}'
+        input_args = [
+            '-f', 'x11grab',
+            '-framerate', rate,
+            '-video_size', f'{screen_size[0]}x{screen_size[1]}',
+            '-i', ':0.0',
+            '-r', rate
+        ]
+        return input_args, ['-vf', window_filter(geometry, output_size)]
+    
+    def on_window_changed(self, geometry):
+        """Move the crop to follow the tracked window (tracker thread)."""
+        process = self.recording_process
+        if process and process.stdin:
+            process.stdin.write(crop_commands(geometry).encode())
+            process.stdin.flush()
+    
+    def plan_target_recording(self, cmd, input_args, filter_args, output_file):
+        """Probe the screen content and start a target-size recording (worker thread)."""
+        try:
+            plan = plan_crf(input_args, filter_args, self.size_target.bitrate, bias=self.target_bias)
+        except Exception as e:
+            self.preparing_recording = False
+            self.call_from_thread(self.query_one("#status").update, f"❌ Probe encode failed: {e}")
+            return
+        self.crf_plan = plan
+        self.call_from_thread(self.begin_recording, cmd + plan.encoder_args(self.size_target), output_file)
+    
+    def begin_recording(self, cmd, output_file):
+        """Launch the recording process and switch the UI to recording mode."""
+        self.preparing_recording = False
+        self.capture_cmd = cmd
+        self.recording_segments = []
+        self.rollover_note = ""
+        tap_note = self.start_frame_tap() if self.frame_tap_plugins else ""
+        
+        try:
+            self.launch_recording(output_file)
             
             self.recording = True
             self.recording_start_time = time.time()
-            self.output_file = output_file
             
             # Update UI
             self.query_one("#record-full").disabled = True
             self.query_one("#record-area").disabled = True
+            self.query_one("#record-window").disabled = True
             self.query_one("#stop").disabled = False
-            self.query_one("#status").update("🔴 Recording in progress...")
+            status = "🔴 Recording in progress..."
+            if self.crf_plan:
+                status += f" • CRF {self.crf_plan.crf} for {self.size_target}"
+            self.query_one("#status").update(status + self.streaming_suffix() + tap_note)
+            
+            if self.window_tracker:
+                self.window_tracker.start()
             
             # Start timer for progress updates
             self.set_timer(1.0, self.update_recording_status)
             
         except Exception as e:
+            self.close_frame_tap()
             self.query_one("#status").update(f"❌ Failed to start recording: {e}")
     
-    def stop_recording(self):
-        """Stop recording."""
-        if not self.recording or not self.recording_process:
+    def start_frame_tap(self):
+        """Create the shared-memory frame tap and load its plugins; returns a status note."""
+        width, height = self.capture_size
+        tap_height = min(self.frame_tap_height, height) // 2 * 2
+        tap_width = max(2, round(tap_height * width / height / 2) * 2)
+        try:
+            self.frame_tap = FrameTap(tap_width, tap_height, fps=self.frame_tap_fps)
+        except Exception as e:
+            return f" • ⚠️ frame tap disabled: {e}"
+        errors = load_plugins(self.frame_tap, self.frame_tap_plugins)
+        if errors:
+            return f" • ⚠️ plugin failed: {errors[0]}"
+        return f" • 🔌 {len(self.frame_tap.consumers)} frame consumer(s)"
+    
+    def close_frame_tap(self):
+        """Stop frame consumers and release the shared memory."""
+        if self.frame_tap:
+            self.frame_tap.close()
+            self.frame_tap = None
+    
+    def show_frame_tap_stats(self):
+        """Show per-consumer delivery and lag metrics."""
+        if not self.frame_tap or not self.frame_tap.consumers:
+            self.query_one("#status").update("No frame consumers running")
             return
+        self.query_one("#status").update(" • ".join(
+            f"{name}: {stats}" for name, stats in self.frame_tap.stats().items()
+        ))
+    
+    def launch_recording(self, output_file):
+        """Start ffmpeg writing the prepared capture command to output_file."""
+        cmd = list(self.capture_cmd)
+        if self.stream_urls:
+            cmd.extend(build_tee_output(output_file, self.stream_urls))
+        else:
+            cmd.append(str(output_file))
+        if self.frame_tap:
+            # Raw frames for in-process consumers come from the same capture
+            cmd.extend(self.frame_tap.output_args())
+        
+        # Keep ffmpeg's stderr so a dying recording can say why
+        log_dir = self.config_dir / 'logs'
+        log_dir.mkdir(parents=True, exist_ok=True)
+        self.recording_log = log_dir / f'{output_file.stem}.log'
+        with open(self.recording_log, 'w') as log:
+            self.recording_process = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE if self.window_tracker else None,
+                stdout=subprocess.PIPE if self.frame_tap else subprocess.DEVNULL,
+                stderr=log,
+                preexec_fn=os.setsid
+            )
+        if self.frame_tap:
+            self.frame_tap.attach(self.recording_process.stdout)
+        if self.window_tracker:
+            # A new process starts from the original crop; send the current one
+            self.window_tracker.resend()
         
+        self.output_file = output_file
+        self.recording_segments.append(output_file)
+        self.output_manager.meter.reset()
+    
+    def terminate_recording_process(self):
+        """Ask ffmpeg to finish the file, killing it if it doesn't."""
+        if self.recording_process.poll() is not None:
+            return
         try:
             # Send SIGTERM to stop recording
             os.killpg(os.getpgid(self.recording_process.pid), signal.SIGTERM)
@@ -680,40 +1183,204 @@ class SimpleRecorderApp(App):
         except subprocess.TimeoutExpired:
             # Force kill if needed
             os.killpg(os.getpgid(self.recording_process.pid), signal.SIGKILL)
+    
+    def stop_recording(self, note=""):
+        """Stop recording."""
+        if not self.recording or not self.recording_process:
+            return
+        
+        try:
+            self.terminate_recording_process()
         except Exception as e:
             self.query_one("#status").update(f"❌ Error stopping: {e}")
         
+        self.reset_recording_ui()
+        
+        # Show result
+        if hasattr(self, 'output_file') and self.output_file.exists():
+            size_mb = sum(f.stat().st_size for f in self.recording_segments if f.exists()) / (1024 * 1024)
+            duration = time.time() - self.recording_start_time
+            if duration > 0:
+                self.last_bitrate = size_mb * 1024 * 1024 / duration
+            parts = f", {len(self.recording_segments)} parts" if len(self.recording_segments) > 1 else ""
+            message = f"✅ Recording saved: {self.output_file.name} ({size_mb:.1f} MB{parts})"
+            if self.size_target.enabled:
+                message += " • " + self.report_size_target(size_mb * 1024 * 1024)
+            message += note
+            if self.recording_staged:
+                message += " • moving to output folder..."
+            self.query_one("#status").update(message)
+            self.analyze_recordings(list(self.recording_segments), self.recording_staged, message)
+        else:
+            self.query_one("#status").update("✅ Recording stopped")
+    
+    def analyze_recordings(self, segments, staged, message):
+        """Analyze frame timing of finished recordings in the background, then move staged ones.
+        
+        A new recording may start (or the config reload) while this runs, so the
+        segments and output manager are the ones captured when this recording stopped.
+        """
+        output_manager = self.output_manager
+        staging_dir = output_manager.staging_dir
+        output_dir = output_manager.output_dir
+        
+        def work():
+            summaries = []
+            try:
+                for number, segment in enumerate(segments, 1):
+                    # Reports for staged recordings go where the recording is moved to
+                    directory = output_dir if staged and segment.parent == staging_dir else None
+                    label = f"part {number}: " if len(segments) > 1 else ""
+                    try:
+                        analysis = analyze(segment)
+                        if analysis.frames:
+                            save_report(analysis, directory)
+                            summaries.append(label + str(analysis))
+                    except Exception as e:
+                        summaries.append(f"{label}analysis failed ({e})")
+                if summaries:
+                    # Keep the saved message; the analysis only adds to it
+                    self.call_from_thread(self.report_finished, f"{message} • 📊 {' | '.join(summaries)}")
+            finally:
+                # The recording has to reach the output folder whatever happened above
+                if staged:
+                    note = f" • 📊 {' | '.join(summaries)}" if summaries else ""
+                    self.call_from_thread(self.migrate_staged_recordings, segments, output_manager, note)
+        
+        self.run_worker(work, thread=True)
+    
+    def report_size_target(self, size_bytes):
+        """Compare the finished recording with its size target and learn from the miss."""
+        duration = time.time() - self.recording_start_time
+        if self.crf_plan and duration > 0:
+            # Correct the next probe by how far this one was off (smoothed and clamped)
+            ratio = (size_bytes / duration) / self.crf_plan.predicted
+            self.target_bias = min(2.0, max(0.5, self.target_bias * (0.5 + 0.5 * ratio)))
+        return describe_result(size_bytes, duration, self.size_target)
+    
+    def reset_recording_ui(self):
+        """Return the UI to its idle state after a recording ends."""
         self.recording = False
         self.recording_process = None
+        self.close_frame_tap()
+        if self.window_tracker:
+            self.window_tracker.stop()
+            self.window_tracker = None
         
         # Update UI
         self.query_one("#record-full").disabled = False
         self.query_one("#record-area").disabled = False
+        self.query_one("#record-window").disabled = False
         self.query_one("#stop").disabled = True
+    
+    def migrate_staged_recordings(self, segments, output_manager, note=""):
+        """Move a finished recording's staged segments to its output directory."""
+        def done(target, error):
+            if error:
+                self.call_from_thread(
+                    self.report_finished,
+                    f"❌ Could not move recording to {output_manager.output_dir}: {error}"
+                )
+                return
+            if not self.recording and target.name == self.output_file.name:
+                self.output_file = target
+            self.call_from_thread(self.report_finished, f"✅ Recording saved: {target}{note}")
         
-        # Show result
-        if hasattr(self, 'output_file') and self.output_file.exists():
-            size_mb = self.output_file.stat().st_size / (1024 * 1024)
-            self.query_one("#status").update(
-                f"✅ Recording saved: {self.output_file.name} ({size_mb:.1f} MB)"
-            )
+        for segment in segments:
+            if segment.parent == output_manager.staging_dir:
+                output_manager.migrate(segment, done)
+    
+    def report_finished(self, message):
+        """Report on an earlier recording without hiding the status of one in progress."""
+        if self.recording:
+            self.notify(message)
         else:
-            self.query_one("#status").update("✅ Recording stopped")
+            self.query_one("#status").update(message)
+    
+    def rollover_recording(self, directory):
+        """Continue the recording as a new file in another directory."""
+        self.terminate_recording_process()
+        part = len(self.recording_segments) + 1
+        stem = self.recording_segments[0].stem
+        self.launch_recording(directory / f'{stem}_part{part}{self.output_file.suffix}')
+        self.rollover_note = f" • ↪ continued in {directory}"
+    
+    def size_cap_reached(self):
+        """Whether ffmpeg exited cleanly because the file hit the -fs size cap."""
+        cap = self.size_target.size_cap_bytes
+        if not self.crf_plan or not cap or self.recording_process.returncode != 0:
+            return False
+        try:
+            # -fs stops at the first packet past the cap; the trailer may land just short of it
+            return self.output_file.stat().st_size >= cap * 0.98
+        except OSError:
+            return False
+    
+    def recording_failed(self):
+        """Report a recording whose ffmpeg process exited on its own."""
+        reason = "ffmpeg exited unexpectedly"
+        try:
+            lines = [line.strip() for line in self.recording_log.read_text().splitlines() if line.strip()]
+            if lines:
+                reason = lines[-1]
+        except OSError:
+            pass
+        self.reset_recording_ui()
+        self.query_one("#status").update(f"❌ Recording stopped: {reason}")
+        if self.recording_staged:
+            # Whatever was recorded still belongs in the output folder
+            self.migrate_staged_recordings(list(self.recording_segments), self.output_manager)
     
     def update_recording_status(self):
         """Update recording status."""
         if not self.recording or not self.recording_start_time:
             return
         
+        if self.recording_process.poll() is not None:
+            if self.size_cap_reached():
+                # ffmpeg stops by itself at -fs; that is the end of a normal recording
+                self.stop_recording(note=" • ⏹ size cap reached")
+            else:
+                self.recording_failed()
+            return
+        
         elapsed = time.time() - self.recording_start_time
         minutes = int(elapsed // 60)
         seconds = int(elapsed % 60)
         
-        self.query_one("#status").update(f"🔴 Recording: {minutes:02d}:{seconds:02d}")
+        # Project time-to-full from the live bitrate and roll over before space runs out
+        warning = ""
+        bitrate = self.output_manager.meter.sample(self.output_file)
+        time_left = self.output_manager.time_to_full(self.output_file.parent, bitrate)
+        if time_left is not None and time_left < self.output_manager.warn_seconds:
+            fallback = self.output_manager.next_fallback(self.output_file.parent, bitrate)
+            if fallback:
+                try:
+                    self.rollover_recording(fallback)
+                except Exception as e:
+                    warning = f" • ❌ rollover failed: {e}"
+            elif self.output_file.parent == self.output_manager.staging_dir:
+                warning = f" • ⚠️ staging full in {format_duration(time_left)}"
+            else:
+                warning = f" • ⚠️ disk full in {format_duration(time_left)}"
+        
+        rate = ""
+        if self.size_target.mb_per_min and bitrate:
+            rate = f" • {bitrate * 60 / (1024 * 1024):.1f}/{self.size_target.mb_per_min:g} MB/min"
+        
+        self.query_one("#status").update(
+            f"🔴 Recording: {minutes:02d}:{seconds:02d}{rate}{self.streaming_suffix()}{self.rollover_note}{warning}"
+        )
         
         if self.recording:
             self.set_timer(1.0, self.update_recording_status)
     
+    def streaming_suffix(self):
+        """Describe active stream outputs for the status line."""
+        if not self.stream_urls:
+            return ""
+        return f" • 📡 streaming to {len(self.stream_urls)} target(s)"
+    
     def open_folder(self):
         """Open output folder."""
         try:
@@ -731,6 +1398,102 @@ class SimpleRecorderApp(App):
         if not self.recording:
             self.start_recording(area_select=True)
     
+    def action_record_window(self):
+        """Record a window (W key)."""
+        if not self.recording:
+            self.start_recording(window_select=True)
+    
+    def action_trim(self):
+        """Trim or split the latest recording (T key)."""
+        if self.recording:
+            return
+        recording = latest_recording(Path(self.output_dir))
+        if not recording:
+            self.query_one("#status").update(f"No recordings in {self.output_dir}")
+            return
+        self.push_screen(TrimScreen(recording), lambda result: self.run_trim(recording, result))
+    
+    def run_trim(self, recording, request):
+        """Run a trim or split from TrimScreen in a worker thread."""
+        if not request:
+            return
+        self.query_one("#status").update(f"✂️  Cutting {recording.name}...")
+        
+        def work():
+            try:
+                if request[0] == 'trim':
+                    results = [trim(recording, request[1], request[2])]
+                else:
+                    results = split(recording, request[1])
+            except Exception as e:
+                self.call_from_thread(self.query_one("#status").update, f"❌ Cut failed: {e}")
+                return
+            reencoded = sum(r.reencoded_frames for r in results)
+            elapsed = sum(r.elapsed for r in results)
+            names = ", ".join(r.output.name for r in results)
+            self.call_from_thread(
+                self.query_one("#status").update,
+                f"✅ {names} • {reencoded} frames re-encoded • {elapsed:.1f}s"
+            )
+        
+        self.run_worker(work, thread=True)
+    
+    def export_latest(self, fmt):
+        """Export the latest recording to GIF or WebP in a worker thread."""
+        recording = latest_recording(Path(self.output_dir))
+        if not recording:
+            self.query_one("#status").update(f"No recordings in {self.output_dir}")
+            return
+        options = ExportOptions(
+            fmt,
+            fps=self.export_fps,
+            height=self.export_height,
+            palette=self.export_palette,
+            max_mb=self.export_max_mb
+        )
+        status = self.query_one("#status")
+        
+        def progress(stage, done, total):
+            label = f"segments {done}/{total}" if stage == "segments" else "encoding"
+            self.call_from_thread(status.update, f"🎞️  Exporting {recording.name} • {label}")
+        
+        def work():
+            try:
+                result = export(recording, options=options, progress=progress)
+            except Exception as e:
+                self.call_from_thread(status.update, f"❌ Export failed: {e}")
+                return
+            over = ""
+            if self.export_max_mb and result.size_mb > self.export_max_mb:
+                over = f" • ⚠️ over {self.export_max_mb:g} MB budget"
+            self.call_from_thread(status.update, f"✅ Exported {result}{over}")
+        
+        status.update(f"🎞️  Exporting {recording.name}...")
+        self.run_worker(work, thread=True)
+    
+    def run_retention(self, dry_run=False):
+        """Run the retention policy over output_dir in a worker thread."""
+        engine = RetentionEngine(self.output_dir, self.retention_policy, self.config_dir / 'retention_cache.json')
+        status = self.query_one("#status")
+        
+        def progress(done, total, action):
+            self.call_from_thread(status.update, f"🧹 {done}/{total} {action}")
+        
+        def work():
+            try:
+                actions = engine.run(dry_run=dry_run, progress=progress)
+            except Exception as e:
+                self.call_from_thread(status.update, f"❌ Retention failed: {e}")
+            else:
+                label = "Retention plan" if dry_run else "Retention done"
+                self.call_from_thread(status.update, f"🧹 {label}: {summarize(actions)}")
+            finally:
+                self.retention_engine = None
+        
+        self.retention_engine = None if dry_run else engine
+        status.update("🧹 Planning retention..." if dry_run else "🧹 Running retention...")
+        self.run_worker(work, thread=True)
+    
     def action_stop(self):
         """Stop recording (S key)."""
         if self.recording:
@@ -764,10 +1527,12 @@ class SimpleRecorderApp(App):
     
     def save_screenshot_file(self, area_select=False, format='png'):
         """Save a screenshot using scrot and optionally convert to webp."""
-        Path(self.output_dir).mkdir(parents=True, exist_ok=True)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        temp_png = Path(self.output_dir) / f'screenshot_{timestamp}.png'
-        final_file = Path(self.output_dir) / f'screenshot_{timestamp}.{format}'
+        # Capture into a private temp name; the store picks the final name
+        temp_dir = self.screenshot_store.root / 'tmp'
+        temp_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        temp_png = temp_dir / f'capture_{timestamp}.png'
+        final_file = temp_dir / f'capture_{timestamp}.{format}'
         
         try:
             if area_select:
@@ -781,13 +1546,11 @@ class SimpleRecorderApp(App):
                     if len(coords) == 4:
                         x, y, w, h = coords
                         subprocess.run(['scrot', '-a', f'{x},{y},{w},{h}', str(temp_png)])
-                        
-                        if format == 'webp':
-                            subprocess.run(['convert', str(temp_png), str(final_file)])
-                            temp_png.unlink()
-                            self.query_one("#status").update(f"✅ Screenshot saved: {final_file.name}")
-                        else:
-                            self.query_one("#status").update(f"✅ Screenshot saved: {temp_png.name}")
+                        # Converting, hashing and linking touch the disk; keep them off the UI thread
+                        self.run_worker(
+                            lambda: self.store_screenshot(temp_png, final_file, format),
+                            thread=True
+                        )
                     else:
                         self.query_one("#status").update("Area selection failed")
                 else:
@@ -803,9 +1566,145 @@ class SimpleRecorderApp(App):
         except Exception as e:
             self.query_one("#status").update(f"❌ Failed: {e}")
             self.set_timer(3.0, lambda: self.query_one("#status").update("Ready to record"))
+    
+    def store_screenshot(self, temp_png, final_file, format):
+        """Convert a capture if needed and add it to the screenshot store (worker thread)."""
+        status = self.query_one("#status")
+        captured = temp_png if format == 'webp' else final_file
+        try:
+            if not captured.exists():
+                # scrot exits cleanly when the capture is cancelled or fails to write
+                message = f"❌ Capture failed: {captured.name} was not written"
+            else:
+                if format == 'webp':
+                    subprocess.run(['convert', str(temp_png), str(final_file)], check=True)
+                    temp_png.unlink()
+                entry = self.screenshot_store.add(final_file, format)
+                message = self.describe_screenshot(entry)
+        except FileNotFoundError as e:
+            if e.filename == 'convert':
+                message = "❌ imagemagick not installed (sudo apt install imagemagick)"
+            else:
+                message = f"❌ Capture failed: {e.filename or e} not found"
+        except Exception as e:
+            message = f"❌ Failed: {e}"
+        self.call_from_thread(status.update, message)
+    
+    def describe_screenshot(self, entry):
+        """Status line for a stored screenshot, noting exact and near duplicates."""
+        message = f"✅ Screenshot saved: {entry['name']}"
+        if entry['duplicate']:
+            return message + " • identical to an earlier shot, no extra space used"
+        similar = self.screenshot_store.near_duplicates(entry)
+        if similar:
+            message += f" • looks like {similar[-1]['name']}"
+        return message
+    
+    def show_screenshot_stats(self):
+        """Show how much space screenshot deduplication has saved."""
+        stats = self.screenshot_store.stats()
+        self.query_one("#status").update(
+            f"📸 {stats['shots']} screenshots • {stats['unique']} unique • "
+            f"{stats['stored_bytes'] / (1024 * 1024):.1f} MB stored • "
+            f"{stats['saved_bytes'] / (1024 * 1024):.1f} MB saved"
+        )
+    
+    def show_similar_screenshots(self):
+        """List screenshots that look like the most recent one."""
+        entries = list(self.screenshot_store.entries())
+        if not entries:
+            self.query_one("#status").update("No screenshots yet")
+            return
+        similar = self.screenshot_store.near_duplicates(entries[-1])
+        if similar:
+            names = ", ".join(e['name'] for e in similar[-3:])
+            self.query_one("#status").update(f"📸 {len(similar)} similar to {entries[-1]['name']}: {names}")
+        else:
+            self.query_one("#status").update(f"📸 Nothing similar to {entries[-1]['name']}")
+
+def run_retention_cli(dry_run):
+    """Apply the retention policy from config.json, printing each action."""
+    config = ConfigStore().load()
+    policy = config.retention_policy
+    if not policy.enabled:
+        print("No retention policy configured (see 'retention' in config.json)")
+        return
+    
+    engine = RetentionEngine(config.output_dir, policy, CONFIG_DIR / 'retention_cache.json')
+    if dry_run:
+        actions = engine.run(dry_run=True)
+        for action in actions:
+            print(f"  {action}")
+    else:
+        actions = engine.run(progress=lambda done, total, action: print(f"  [{done}/{total}] {action}"))
+    print(f"🧹 {summarize(actions)}")
+
+def run_cli(argv):
+    """Run a command-line tool instead of the TUI."""
+    parser = argparse.ArgumentParser(prog='recit', description="Recit command-line tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    trim_parser = commands.add_parser('trim', help="Cut the start and/or end of a recording")
+    trim_parser.add_argument('file', nargs='?', help="Recording (default: latest in output_dir)")
+    trim_parser.add_argument('--start', type=parse_time, default=0.0, help="Keep from here (e.g. 5, 0:05)")
+    trim_parser.add_argument('--end', type=parse_time, help="Keep until here; negative counts from the end")
+    trim_parser.add_argument('-o', '--output', help="Output file (default: <name>_trim.<ext>)")
+    
+    split_parser = commands.add_parser('split', help="Split a recording into parts")
+    split_parser.add_argument('file', nargs='?', help="Recording (default: latest in output_dir)")
+    split_parser.add_argument('--at', type=split_points, required=True, help="Split times, e.g. 1:00,2:30")
+    
+    export_parser = commands.add_parser('export', help="Export a recording as GIF or animated WebP")
+    export_parser.add_argument('file', nargs='?', help="Recording (default: latest in output_dir)")
+    export_parser.add_argument('--format', choices=['gif', 'webp'], default='gif')
+    export_parser.add_argument('--fps', type=int, default=12)
+    export_parser.add_argument('--height', type=int, default=480, help="Maximum height (0 keeps source size)")
+    export_parser.add_argument('--palette', choices=['global', 'segment'], default='global',
+                               help="GIF palette: one for the whole clip or one per segment")
+    export_parser.add_argument('--no-dedupe', action='store_true', help="Keep duplicate frames")
+    export_parser.add_argument('--max-mb', type=float, help="Size budget; quality steps down until it fits")
+    export_parser.add_argument('-o', '--output', help="Output file (default: <name>.<format>)")
+    
+    analyze_parser = commands.add_parser('analyze', help="Report frame timing, gaps and bitrate of a recording")
+    analyze_parser.add_argument('file', nargs='?', help="Recording (default: latest in output_dir)")
+    
+    retention_parser = commands.add_parser('retention', help="Apply the retention policy to output_dir")
+    retention_parser.add_argument('--dry-run', action='store_true', help="Only report what would be done")
+    
+    args = parser.parse_args(argv)
+    if args.command == 'retention':
+        run_retention_cli(args.dry_run)
+        return
+    source = Path(args.file) if args.file else latest_recording(Path(ConfigStore().load().output_dir))
+    if not source or not source.exists():
+        parser.error("no recording found")
+    
+    if args.command == 'analyze':
+        analysis = analyze(source)
+        print(f"📊 {source.name}: {analysis}")
+        print(f"   Report: {save_report(analysis)}")
+        return
+    
+    if args.command == 'export':
+        options = ExportOptions(args.format, fps=args.fps, height=args.height or None,
+                                palette=args.palette, dedupe=not args.no_dedupe, max_mb=args.max_mb)
+        result = export(source, Path(args.output) if args.output else None, options,
+                        progress=lambda stage, done, total: print(f"  {stage} {done}/{total}"))
+        print(f"🎞️  {result}")
+        return
+    
+    if args.command == 'trim':
+        results = [trim(source, args.start, args.end, Path(args.output) if args.output else None)]
+    else:
+        results = split(source, args.at)
+    for result in results:
+        print(f"✂️  {result}")
 
 def main():
     """Run the app."""
+    if len(sys.argv) > 1:
+        run_cli(sys.argv[1:])
+        return
     app = SimpleRecorderApp()
     app.run()
 
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Retention and compaction for output_dir
+
+A run first builds a plan:
+
+  * recordings older than `compact_after_days` are re-encoded to a compact
+    profile next to the original (`<name>.compact.webm`)
+  * while the directory is over `quota_gb`, originals that have a compact
+    copy are deleted, oldest first
+  * PNG screenshots are converted to WebP or AVIF
+
+The plan is the dry-run report. Executing it runs the re-encodes on a small
+process pool at low CPU priority, handing out one file at a time: each new
+job waits `pause_seconds` after the last one finished, and longer while the
+machine is busy. Outputs are written to a `.partial` file and renamed when
+complete. Every finished file is recorded in a fingerprint
+cache, so an interrupted run picks up where it stopped and already-compacted
+files are skipped.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import subprocess
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from screenshot_utils import ScreenshotStore
+
+RECORDING_SUFFIXES = ('.webm', '.mkv', '.mp4')
+COMPACT_SUFFIX = '.compact.webm'
+
+# Small, slow-to-encode but cheap-to-keep archive profile
+COMPACT_ARGS = [
+    '-vf', "scale=-2:'min(720,ih)'",
+    '-c:v', 'libvpx-vp9', '-crf', '42', '-b:v', '0',
+    '-deadline', 'good', '-cpu-used', '4', '-row-mt', '1', '-threads', '2',
+]
+
+# Expected compact size relative to the original, for dry-run estimates
+COMPACT_RATIO = 0.3
+
+# Settings a retention policy accepts in config.json
+POLICY_KEYS = ('compact_after_days', 'quota_gb', 'screenshot_format', 'workers', 'pause_seconds')
+
+# New jobs wait while the load per CPU is above this
+BUSY_LOAD = 0.8
+BUSY_POLL_SECONDS = 5.0
+
+Progress = Callable[[int, int, str], None]
+
+
+class RetentionPolicy:
+    def __init__(self, compact_after_days: Optional[float] = None, quota_gb: Optional[float] = None,
+                 screenshot_format: Optional[str] = None, workers: int = 1, pause_seconds: float = 1.0):
+        if screenshot_format not in (None, 'webp', 'avif'):
+            raise ValueError(f"Unknown screenshot format '{screenshot_format}'")
+        self.compact_after_days = compact_after_days
+        self.quota_gb = quota_gb
+        self.screenshot_format = screenshot_format
+        self.workers = max(1, workers)
+        self.pause_seconds = pause_seconds
+
+    @classmethod
+    def from_dict(cls, values: Dict) -> 'RetentionPolicy':
+        """Build a policy from config.json, rejecting unknown keys and values of the wrong type"""
+        unknown = sorted(set(values) - set(POLICY_KEYS))
+        if unknown:
+            raise ValueError(f"Unknown retention setting(s): {', '.join(unknown)}")
+        for key in ('compact_after_days', 'quota_gb'):
+            value = values.get(key)
+            if value is not None and not _is_number(value, minimum=0):
+                raise ValueError(f"{key} must be a positive number, not {value!r}")
+        workers = values.get('workers', 1)
+        if not isinstance(workers, int) or isinstance(workers, bool) or workers < 1:
+            raise ValueError(f"workers must be a whole number of at least 1, not {workers!r}")
+        if not _is_number(values.get('pause_seconds', 1.0), minimum=0, inclusive=True):
+            raise ValueError(f"pause_seconds must be a number of seconds, not {values['pause_seconds']!r}")
+        return cls(
+            values.get('compact_after_days'),
+            values.get('quota_gb'),
+            values.get('screenshot_format'),
+            values.get('workers', 1),
+            values.get('pause_seconds', 1.0),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.compact_after_days or self.quota_gb or self.screenshot_format)
+
+
+def _is_number(value, minimum: float, inclusive: bool = False) -> bool:
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return False
+    return value >= minimum if inclusive else value > minimum
+
+
+class Action:
+    def __init__(self, kind: str, path: Path, estimated_savings: int, target: Optional[Path] = None):
+        self.kind = kind
+        self.path = path
+        self.estimated_savings = estimated_savings
+        self.target = target
+
+    def __str__(self):
+        arrow = f" → {self.target.name}" if self.target else ""
+        mb = self.estimated_savings / (1024 * 1024)
+        effect = f"frees ~{mb:.1f} MB" if mb >= 0 else f"uses ~{-mb:.1f} MB"
+        return f"{self.kind:<8} {self.path.name}{arrow} ({effect})"
+
+
+def fingerprint(path: Path) -> str:
+    """Cheap content fingerprint: size plus hashes of the first and last 64 KB"""
+    size = path.stat().st_size
+    digest = hashlib.sha1(str(size).encode())
+    with open(path, 'rb') as f:
+        digest.update(f.read(65536))
+        if size > 65536:
+            f.seek(max(65536, size - 65536))
+            digest.update(f.read(65536))
+    return digest.hexdigest()
+
+
+class FingerprintCache:
+    """Fingerprints of files the engine has already produced or finished with"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        try:
+            with open(path, 'r') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, path: Path) -> Optional[Dict]:
+        try:
+            return self.entries.get(fingerprint(path))
+        except OSError:
+            return None
+
+    def mark(self, path: Path, **info):
+        self.entries[fingerprint(path)] = dict(info, name=path.name)
+        self.save()
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_suffix('.tmp')
+        with open(temp, 'w') as f:
+            json.dump(self.entries, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.path)
+
+
+def _load_per_cpu() -> float:
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except OSError:
+        return 0.0
+
+
+def _niceness():
+    """Pool initializer: keep compaction out of the way of recording"""
+    try:
+        os.nice(10)
+    except OSError:
+        pass
+
+
+def compact_recording(source: str, target: str) -> str:
+    """Re-encode a recording to the compact profile (worker)"""
+    partial = target + '.partial'
+    subprocess.run(['ffmpeg', '-y', '-i', source] + COMPACT_ARGS + ['-f', 'webm', partial],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    os.replace(partial, target)
+    return target
+
+
+def convert_image(source: str, target: str) -> str:
+    """Convert a screenshot with ImageMagick (worker)"""
+    partial = target + '.partial'
+    fmt = Path(target).suffix.lstrip('.')
+    subprocess.run(['convert', source, '-quality', '80', f'{fmt}:{partial}'],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    os.replace(partial, target)
+    return target
+
+
+class RetentionEngine:
+    def __init__(self, output_dir: str, policy: RetentionPolicy, cache_file: Path):
+        self.output_dir = Path(output_dir)
+        self.policy = policy
+        self.cache = FingerprintCache(cache_file)
+        self.store = ScreenshotStore(output_dir)
+        self._stop = False
+
+    def stop(self):
+        """Finish the running job and stop; the next run resumes"""
+        self._stop = True
+
+    def _recordings(self) -> List[Path]:
+        files = [p for p in self.output_dir.glob('recording_*')
+                 if p.suffix in RECORDING_SUFFIXES and not p.name.endswith(COMPACT_SUFFIX)]
+        return sorted(files, key=lambda p: p.stat().st_mtime)
+
+    def _is_compacted(self, path: Path) -> bool:
+        """Whether `path` is a compact copy, or an original that was already compacted"""
+        entry = self.cache.get(path)
+        return bool(entry and (entry.get('compact') or entry.get('compacted_to')))
+
+    def _usage(self) -> int:
+        """Bytes used under output_dir, counting hard-linked files once"""
+        seen = set()
+        total = 0
+        for path in self.output_dir.rglob('*'):
+            if path.is_symlink() or not path.is_file():
+                continue
+            info = path.stat()
+            if (info.st_dev, info.st_ino) not in seen:
+                seen.add((info.st_dev, info.st_ino))
+                total += info.st_size
+        return total
+
+    def plan(self) -> List[Action]:
+        """Work out what a run would do, without touching anything"""
+        actions = []
+        now = time.time()
+        compacts = {}
+
+        if self.policy.compact_after_days:
+            cutoff = now - self.policy.compact_after_days * 86400
+            for recording in self._recordings():
+                target = recording.with_name(recording.stem + COMPACT_SUFFIX)
+                if target.exists():
+                    compacts[recording] = target
+                    continue
+                if recording.stat().st_mtime > cutoff or self._is_compacted(recording):
+                    continue
+                # Compacting costs space until the original is evicted
+                size = recording.stat().st_size
+                actions.append(Action('compact', recording, -int(size * COMPACT_RATIO), target))
+                compacts[recording] = target
+
+        if self.policy.quota_gb:
+            quota = self.policy.quota_gb * 1024 ** 3
+            usage = self._usage() - sum(a.estimated_savings for a in actions)
+            for recording in sorted(compacts, key=lambda p: p.stat().st_mtime):
+                if usage <= quota:
+                    break
+                size = recording.stat().st_size
+                actions.append(Action('evict', recording, size))
+                usage -= size
+
+        if self.policy.screenshot_format:
+            fmt = self.policy.screenshot_format
+            for image in self.store.objects():
+                if image.suffix == '.png':
+                    actions.append(Action('convert', image, image.stat().st_size // 2,
+                                          image.with_suffix(f'.{fmt}')))
+            for image in self.output_dir.glob('screenshot_*.png'):
+                # Loose screenshots from before the store existed
+                if image.stat().st_nlink == 1 and not image.is_symlink():
+                    actions.append(Action('convert', image, image.stat().st_size // 2,
+                                          image.with_suffix(f'.{fmt}')))
+        return actions
+
+    def run(self, dry_run: bool = False, progress: Optional[Progress] = None) -> List[Action]:
+        """Execute the plan (or just return it for a dry run); returns the actions completed"""
+        actions = self.plan()
+        if dry_run or not actions:
+            return actions
+
+        done = []
+        encodes = [a for a in actions if a.kind in ('compact', 'convert')]
+        queue = list(encodes)
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.policy.workers, mp_context=context,
+                                 initializer=_niceness) as pool:
+            futures = {}
+
+            def submit_next():
+                action = queue.pop(0)
+                if action.kind == 'compact':
+                    future = pool.submit(compact_recording, str(action.path), str(action.target))
+                else:
+                    temp = Path(tempfile.mkdtemp(prefix='recit-retention-')) / action.target.name
+                    future = pool.submit(convert_image, str(action.path), str(temp))
+                futures[future] = action
+
+            # Jobs are handed out one at a time so the pause and load checks actually throttle
+            while queue and len(futures) < self.policy.workers:
+                submit_next()
+            count = 0
+            while futures:
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    action = futures.pop(future)
+                    count += 1
+                    self._finish(action, future, done)
+                    if progress:
+                        progress(count, len(encodes), str(action))
+                if self._stop:
+                    return done
+                if queue:
+                    self._wait_until_quiet()
+                    while queue and len(futures) < self.policy.workers and not self._stop:
+                        submit_next()
+
+        # Evict only originals whose compact copy really exists now
+        for action in actions:
+            if action.kind != 'evict' or self._stop:
+                continue
+            compact = action.path.with_name(action.path.stem + COMPACT_SUFFIX)
+            if compact.exists() and action.path.exists():
+                action.path.unlink()
+                done.append(action)
+                if progress:
+                    progress(len(done), len(actions), str(action))
+        return done
+
+    def _finish(self, action: Action, future, done: List[Action]):
+        """Put a finished job's output in place"""
+        try:
+            result = Path(future.result())
+        except Exception:
+            return
+        if action.kind == 'compact':
+            self.cache.mark(result, compact=True, source=action.path.name)
+            self.cache.mark(action.path, compacted_to=result.name)
+        elif action.path.parent.parent == self.store.objects_dir:
+            self.store.replace_object(action.path, result, result.suffix.lstrip('.'))
+            result.parent.rmdir()
+        else:
+            os.replace(result, action.target)
+            result.parent.rmdir()
+            action.path.unlink()
+        done.append(action)
+
+    def _wait_until_quiet(self):
+        """Pause between jobs, and keep waiting while the machine is busy"""
+        time.sleep(self.policy.pause_seconds)
+        while not self._stop and _load_per_cpu() > BUSY_LOAD:
+            time.sleep(BUSY_POLL_SECONDS)
+
+
+def summarize(actions: List[Action]) -> str:
+    """One-line summary of a plan or a finished run"""
+    counts = {}
+    for action in actions:
+        counts[action.kind] = counts.get(action.kind, 0) + 1
+    saved = sum(a.estimated_savings for a in actions) / (1024 * 1024)
+    parts = [f"{n} {kind}" for kind, n in counts.items()] or ["nothing to do"]
+    return f"{', '.join(parts)} • ~{saved:.0f} MB freed"
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Content-addressed, deduplicated screenshot store
+
+Each distinct image is stored once under .screenshots/objects/, named by its
+SHA-256. Every capture appends a small timestamped entry to an append-only
+manifest (manifest.jsonl) and gets a friendly name in the output directory,
+so identical shots cost no extra disk space. A 64-bit difference hash
+(dHash) of each image finds near-identical shots.
+
+Friendly names are copy-on-write clones (reflinks) where the filesystem
+supports them, so editing one leaves the others alone. Elsewhere they are
+hard links to a read-only object: editors that save by writing a new file
+break the link, and in-place writes fail instead of changing every copy.
+Manifest updates hold an exclusive lock on manifest.lock, so concurrent
+captures and compaction don't lose each other's entries.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import stat
+import subprocess
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+# ioctl that makes a file share another's extents copy-on-write (Btrfs, XFS, bcachefs)
+FICLONE = 0x40049409
+
+READ_ONLY = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def dhash(path: Path) -> Optional[str]:
+    """64-bit difference hash of an image as hex, via ImageMagick"""
+    try:
+        result = subprocess.run(
+            ['convert', str(path), '-colorspace', 'Gray', '-resize', '9x8!', '-depth', '8', 'gray:-'],
+            capture_output=True, timeout=30
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    pixels = result.stdout
+    if result.returncode != 0 or len(pixels) != 72:
+        return None
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (1 if left > right else 0)
+    return f"{bits:016x}"
+
+
+def hamming(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+def reflink(source: Path, target: Path) -> bool:
+    """Clone `source` to `target` copy-on-write; False if the filesystem can't"""
+    try:
+        with open(source, 'rb') as src, open(target, 'xb') as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                return True
+            except OSError:
+                pass
+    except OSError:
+        return False
+    target.unlink()
+    return False
+
+
+class ScreenshotStore:
+    def __init__(self, output_dir: str):
+        self.output_dir = Path(output_dir)
+        self.root = self.output_dir / '.screenshots'
+        self.objects_dir = self.root / 'objects'
+        self.manifest_file = self.root / 'manifest.jsonl'
+        self.lock_file = self.root / 'manifest.lock'
+
+    @contextmanager
+    def _locked(self):
+        """Hold the manifest lock (shared across threads and processes)"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_file, 'a') as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def object_path(self, sha: str, fmt: str) -> Path:
+        return self.objects_dir / sha[:2] / f'{sha}.{fmt}'
+
+    def entries(self) -> Iterator[Dict]:
+        """Iterate manifest entries, oldest first"""
+        if not self.manifest_file.exists():
+            return
+        with open(self.manifest_file, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    def _phash_for(self, sha: str) -> Optional[str]:
+        for entry in self.entries():
+            if entry['sha256'] == sha:
+                return entry.get('phash')
+        return None
+
+    def add(self, image: Path, fmt: str) -> Dict:
+        """Store an image (the file is moved or deleted) and return its manifest entry"""
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        now = datetime.now()
+        sha = sha256_file(image)
+        size = image.stat().st_size
+        target = self.object_path(sha, fmt)
+        duplicate = target.exists()
+        if duplicate:
+            image.unlink()
+            phash = self._phash_for(sha)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(str(image), str(target))
+            os.chmod(target, READ_ONLY)
+            phash = dhash(target)
+
+        name = f"screenshot_{now.strftime('%Y%m%d_%H%M%S_%f')}.{fmt}"
+        self._link(target, self.output_dir / name)
+
+        entry = {
+            'timestamp': now.isoformat(timespec='microseconds'),
+            'name': name,
+            'sha256': sha,
+            'phash': phash,
+            'format': fmt,
+            'bytes': size,
+            'duplicate': duplicate,
+        }
+        with self._locked(), open(self.manifest_file, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+        return entry
+
+    def _link(self, target: Path, link: Path):
+        """Give the object a friendly name in the output folder without copying it"""
+        if reflink(target, link):
+            return
+        try:
+            os.link(target, link)
+        except OSError:
+            link.symlink_to(os.path.relpath(target, link.parent))
+
+    def _is_copy_of(self, name: Path, obj: Path, sha: str) -> bool:
+        """Whether the friendly file still shows the stored object, i.e. wasn't edited"""
+        try:
+            if os.path.samefile(name, obj):
+                return True
+            # A reflink is a separate inode; compare content instead
+            return not name.is_symlink() and sha256_file(name) == sha
+        except OSError:
+            return False
+
+    def _write_manifest(self, entries: List[Dict]):
+        temp = self.manifest_file.with_suffix('.tmp')
+        with open(temp, 'w') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.manifest_file)
+
+    def objects(self) -> Iterator[Path]:
+        """Every stored image file"""
+        if self.objects_dir.exists():
+            yield from (p for p in self.objects_dir.glob('*/*') if p.is_file())
+
+    def replace_object(self, old: Path, new_file: Path, fmt: str) -> int:
+        """Swap a stored image for a re-encoded copy and relink its names; returns bytes saved
+
+        Names that were edited since capture are left alone (and dropped from
+        the object) rather than replaced with the re-encoded original.
+        """
+        sha = old.stem
+        new_sha = sha256_file(new_file)
+        target = self.object_path(new_sha, fmt)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(new_file), str(target))
+        os.chmod(target, READ_ONLY)
+        new_size = target.stat().st_size
+
+        with self._locked():
+            entries = list(self.entries())
+            for entry in entries:
+                if entry['sha256'] != sha:
+                    continue
+                old_link = self.output_dir / entry['name']
+                if old_link.exists() and not self._is_copy_of(old_link, old, sha):
+                    # The edited file is its own image now
+                    entry.update(sha256=sha256_file(old_link), bytes=old_link.stat().st_size, edited=True)
+                    continue
+                # Break the old name's link before the new one takes its place
+                if old_link.is_symlink() or old_link.exists():
+                    old_link.unlink()
+                new_name = str(Path(entry['name']).with_suffix(f'.{fmt}'))
+                self._link(target, self.output_dir / new_name)
+                entry.update(name=new_name, sha256=new_sha, format=fmt, bytes=new_size, source_sha256=sha)
+            self._write_manifest(entries)
+
+        old_size = old.stat().st_size
+        old.unlink()
+        return old_size - new_size
+
+    def near_duplicates(self, entry: Dict, max_distance: int = 6) -> List[Dict]:
+        """Other shots whose perceptual hash is within `max_distance` bits"""
+        if not entry.get('phash'):
+            return []
+        matches = []
+        for other in self.entries():
+            if other['name'] == entry['name'] or not other.get('phash'):
+                continue
+            if hamming(entry['phash'], other['phash']) <= max_distance:
+                matches.append(other)
+        return matches
+
+    def stats(self) -> Dict[str, int]:
+        """Shots taken, unique images stored, and bytes saved by deduplication"""
+        shots = 0
+        logical = 0
+        unique = {}
+        for entry in self.entries():
+            shots += 1
+            logical += entry['bytes']
+            unique[entry['sha256']] = entry['bytes']
+        stored = sum(unique.values())
+        return {'shots': shots, 'unique': len(unique), 'stored_bytes': stored, 'saved_bytes': logical - stored}
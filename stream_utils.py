@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Live streaming utilities: tee outputs and glass-to-glass latency measurement
+"""
+
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import urlparse
+
+# Muxer used for each supported URL scheme
+STREAM_FORMATS = {
+    'udp': 'mpegts',
+    'rtp': 'rtp_mpegts',
+    'srt': 'mpegts',
+    'rtmp': 'flv',
+}
+
+
+def latency_encoder_args(framerate: int) -> List[str]:
+    """Return low-latency H.264 encoder arguments (no B-frames, no lookahead, 1s GOP)"""
+    return [
+        '-c:v', 'libx264',
+        '-preset', 'veryfast',
+        '-tune', 'zerolatency',
+        '-g', str(framerate),
+        '-bf', '0',
+        '-pix_fmt', 'yuv420p',
+        '-flags', '+global_header',
+    ]
+
+
+def stream_format(url: str) -> str:
+    """Return the muxer to use for a stream URL"""
+    scheme = urlparse(url).scheme
+    if scheme not in STREAM_FORMATS:
+        raise ValueError(f"Unsupported stream URL '{url}' (use {', '.join(STREAM_FORMATS)})")
+    return STREAM_FORMATS[scheme]
+
+
+def _escape_tee(value: str) -> str:
+    """Escape characters that are special in tee slave specifications"""
+    return re.sub(r"([\\|\[\]:=])", r"\\\1", value)
+
+
+def build_tee_output(output_file: Path, stream_urls: List[str]) -> List[str]:
+    """Build ffmpeg output arguments that write the file and every stream from one encode"""
+    slaves = [f"[f=matroska]{_escape_tee(str(output_file))}"]
+    for url in stream_urls:
+        fmt = stream_format(url)
+        options = [f"f={fmt}", "onfail=ignore"]
+        if fmt in ('mpegts', 'rtp_mpegts'):
+            # Repeat SPS/PPS on keyframes so late joiners can decode
+            options.append("bsfs/v=dump_extra")
+        slaves.append(f"[{':'.join(options)}]{url}")
+    return ['-map', '0:v', '-f', 'tee', '|'.join(slaves)]
+
+
+def measure_glass_to_glass(url: str, flash_at: float = 3.0, timeout: float = 15.0,
+                           framerate: int = 30) -> Optional[float]:
+    """Measure glass-to-glass latency through a stream URL.
+
+    A sender encodes a black test pattern that turns white `flash_at` seconds
+    into the stream, using the same low-latency settings and tee output (a
+    throwaway file plus the stream) as a recording. The
+    sender's showinfo filter reports each frame as it is drawn, so the flash
+    is timestamped when it really enters the pipeline rather than counted
+    from process start (which would include ffmpeg start-up and probing). A
+    local ffmpeg listener decodes the stream and reports each frame's luma;
+    the latency is the time between the flash being drawn and it being seen
+    on the receiving side. Returns seconds, or None if nothing arrived.
+    """
+    # Luma goes to the log on stderr, which ffmpeg writes line by line (stdout is
+    # block-buffered); no probing, so decoding starts with the first packet
+    receiver = subprocess.Popen(
+        ['ffmpeg', '-hide_banner', '-loglevel', 'info', '-nostats',
+         '-fflags', 'nobuffer', '-flags', 'low_delay', '-probesize', '32', '-analyzeduration', '0']
+        + _listener_input_args(url)
+        + ['-vf', 'signalstats,metadata=print:key=lavfi.signalstats.YAVG', '-f', 'null', '-'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    seen_at = []
+    drawn_at = []
+
+    def watch():
+        for line in receiver.stderr:
+            match = re.search(r'YAVG=([\d.]+)', line)
+            if match and float(match.group(1)) > 128:
+                seen_at.append(time.monotonic())
+                return
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    time.sleep(0.5)
+
+    # Same output path as a recording, so the tee muxer's cost is part of the measurement
+    scratch = tempfile.TemporaryDirectory(prefix='recit-g2g-')
+    sender_cmd = [
+        'ffmpeg', '-hide_banner', '-loglevel', 'info', '-nostats', '-re',
+        '-f', 'lavfi', '-i', f'color=c=black:s=640x360:r={framerate}',
+        '-vf', f"geq=lum='if(gte(T,{flash_at}),235,16)':cb=128:cr=128,showinfo",
+    ] + latency_encoder_args(framerate) + build_tee_output(Path(scratch.name) / 'g2g.mkv', [url])
+    sender = subprocess.Popen(sender_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+    def watch_sender():
+        # showinfo logs each frame as the filter graph produces it; -re paces that in real time
+        for line in sender.stderr:
+            match = re.search(r'pts_time:\s*([\d.]+)', line)
+            if match and not drawn_at and float(match.group(1)) >= flash_at:
+                drawn_at.append(time.monotonic())
+
+    threading.Thread(target=watch_sender, daemon=True).start()
+
+    watcher.join(timeout=timeout)
+    for process in (sender, receiver):
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    scratch.cleanup()
+
+    if not seen_at or not drawn_at:
+        return None
+    return seen_at[0] - drawn_at[0]
+
+
+def _listener_input_args(url: str) -> List[str]:
+    """Input arguments that make the receiving ffmpeg wait for the sender on `url`"""
+    scheme = urlparse(url).scheme
+    if scheme == 'rtmp':
+        return ['-listen', '1', '-i', url]
+    if scheme == 'srt' and 'mode=' not in url:
+        return ['-i', url + ('&' if '?' in url else '?') + 'mode=listener']
+    return ['-i', url]
+
+
+def main():
+    """Measure glass-to-glass latency for a stream URL"""
+    url = sys.argv[1] if len(sys.argv) > 1 else 'udp://127.0.0.1:23000'
+    print(f"📡 Measuring glass-to-glass latency via {url}")
+    latency = measure_glass_to_glass(url)
+    if latency is None:
+        print("❌ No frames received")
+        sys.exit(1)
+    print(f"Latency: {latency * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Capture planner checks for fractional refresh rates
+
+    python3 -m pytest test_capture_utils.py
+"""
+
+from capture_utils import HEADROOM, CapturePlanner, refresh_divisors
+from monitor_utils import Mode, Monitor
+
+PIXELS_1080P = 1920 * 1080
+
+
+def monitor(refresh: float) -> Monitor:
+    screen = Monitor('DP-1', 1920, 1080, is_primary=True)
+    screen.modes.append(Mode(1920, 1080, [refresh], current_rate=refresh, preferred=True))
+    return screen
+
+
+def plan(refresh: float, fps_at_1080p: float):
+    """Plan with a throughput that sustains `fps_at_1080p` at 1080p within the headroom"""
+    throughput = PIXELS_1080P * fps_at_1080p / HEADROOM
+    return CapturePlanner([]).plan(monitor(refresh), throughput=throughput)
+
+
+def test_divisors_of_fractional_rates():
+    assert refresh_divisors(59.94)[:2] == [59.94, 29.97]
+    assert refresh_divisors(119.88)[:3] == [59.94, 39.96, 29.97]
+    assert refresh_divisors(143.98)[:3] == [47.993, 35.995, 28.796]
+
+
+def test_fast_encoder_uses_highest_divisor():
+    for refresh, fps in ((59.94, 59.94), (119.88, 59.94), (143.98, 47.993)):
+        result = plan(refresh, 200)
+        assert (result.height, result.fps) == (1080, fps), refresh
+
+
+def test_29_97_counts_as_smooth():
+    # Only ~35 fps fits at 1080p: NTSC rates keep 1080p at 29.97 instead of dropping to 720p
+    for refresh in (59.94, 119.88):
+        result = plan(refresh, 35)
+        assert (result.height, result.fps) == (1080, 29.97), refresh
+
+
+def test_below_smooth_steps_down_a_size():
+    # 143.98 Hz has no divisor near 30 that fits (35.995 doesn't, 28.796 is too slow)
+    result = plan(143.98, 35)
+    assert (result.height, result.fps) == (720, 47.993)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Export timing checks: deduplicated, parallel exports keep the source's duration
+
+    python3 -m pytest test_export_utils.py
+"""
+
+import shutil
+import struct
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from export_utils import ExportOptions, export
+
+pytestmark = pytest.mark.skipif(not (shutil.which('ffmpeg') and shutil.which('ffprobe')),
+                                reason="needs ffmpeg and ffprobe")
+
+MOTION, STILL = 4, 8
+SECONDS = MOTION + STILL
+FPS = 12
+
+
+def gif_duration(path: Path) -> float:
+    """Sum of the graphic control extension delays, in seconds"""
+    data = path.read_bytes()
+    delays, at = 0, data.find(b'\x21\xf9\x04')
+    while at != -1:
+        delays += struct.unpack_from('<H', data, at + 4)[0]
+        at = data.find(b'\x21\xf9\x04', at + 1)
+    return delays / 100
+
+
+def webp_duration(path: Path) -> float:
+    """Sum of the ANMF frame durations, in seconds"""
+    data = path.read_bytes()
+    total, at = 0, 12
+    while at + 8 <= len(data):
+        kind, size = data[at:at + 4], struct.unpack_from('<I', data, at + 4)[0]
+        if kind == b'ANMF':
+            total += int.from_bytes(data[at + 8 + 12:at + 8 + 15], 'little')
+        at += 8 + size + (size & 1)
+    return total / 1000
+
+
+@pytest.fixture(scope='module')
+def source(tmp_path_factory) -> Path:
+    """Motion followed by a static tail that spans whole segments"""
+    path = tmp_path_factory.mktemp('export') / 'clip.mp4'
+    subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-f', 'lavfi',
+                    '-i', f'testsrc2=size=320x240:rate=30:duration={MOTION}',
+                    '-vf', f'tpad=stop_mode=clone:stop_duration={STILL}',
+                    '-pix_fmt', 'yuv420p', str(path)], check=True)
+    return path
+
+
+@pytest.mark.parametrize('fmt, palette, measure', [
+    ('gif', 'global', gif_duration),
+    ('gif', 'segment', gif_duration),
+    ('webp', 'global', webp_duration),
+])
+def test_dedupe_keeps_duration(source, tmp_path, fmt, palette, measure):
+    output = tmp_path / f'clip.{fmt}'
+    export(source, output, ExportOptions(fmt=fmt, fps=FPS, height=None, palette=palette, workers=4))
+    assert measure(output) == pytest.approx(SECONDS, abs=2 / FPS + 0.05)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Keyframe-aware trim and split for recordings (smart cut)
+
+Stream copy can only start a file on a keyframe. A smart cut re-encodes the
+frames from the requested start up to the next keyframe, stream-copies
+everything after it, and joins the two with the concat demuxer. Recit's
+encoders don't use B-frames, so frames before a cut never reference frames
+after it, and the end edge can be cut by stream copy without re-encoding.
+
+Concat only works if both parts decode with the same parameters, so the
+re-encoded head copies the source's profile, level, pixel format, size and
+time base. The head is probed after encoding; if it still differs, or the
+codec is one Recit can't rebuild, the whole range is re-encoded instead.
+"""
+
+import json
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Encoder settings used to rebuild the partial group of pictures at a cut;
+# profile, level, pixel format and size are added from the source stream
+REENCODE_ARGS = {
+    'vp9': ['-c:v', 'libvpx-vp9', '-crf', '32', '-b:v', '0'],
+    'h264': ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '20', '-bf', '0'],
+    'vp8': ['-c:v', 'libvpx', '-crf', '10', '-b:v', '1M'],
+}
+
+# Codec for a full re-encode of a stream Recit can't smart-cut, by output container
+FALLBACK_CODECS = {'.webm': 'vp9'}
+DEFAULT_FALLBACK_CODEC = 'h264'
+
+# Stream parameters the head and the copied body must agree on
+MATCHING_FIELDS = ('codec', 'profile', 'level', 'pix_fmt', 'width', 'height')
+
+
+class TrimResult:
+    def __init__(self, output: Path, reencoded_frames: int, copied_frames: int, elapsed: float,
+                 fallback: Optional[str] = None):
+        self.output = output
+        self.reencoded_frames = reencoded_frames
+        self.copied_frames = copied_frames
+        self.elapsed = elapsed
+        # Why the whole range was re-encoded, if it was
+        self.fallback = fallback
+
+    def __str__(self):
+        text = (f"{self.output.name}: {self.reencoded_frames} frames re-encoded, "
+                f"{self.copied_frames} copied in {self.elapsed:.1f}s")
+        if self.fallback:
+            text += f" (full re-encode: {self.fallback})"
+        return text
+
+
+class StreamInfo:
+    """Video stream parameters that decide whether two files can be concatenated"""
+
+    def __init__(self, stream: Dict, duration: float):
+        self.codec = stream.get('codec_name')
+        self.profile = stream.get('profile')
+        self.level = stream.get('level')
+        self.pix_fmt = stream.get('pix_fmt')
+        self.width = stream.get('width')
+        self.height = stream.get('height')
+        self.time_base = stream.get('time_base')
+        self.duration = duration
+
+    def differences(self, other: 'StreamInfo') -> List[str]:
+        return [f"{field} {getattr(self, field)} instead of {getattr(other, field)}"
+                for field in MATCHING_FIELDS if getattr(self, field) != getattr(other, field)]
+
+    def encoder_args(self, suffix: str) -> List[str]:
+        """Arguments that make the rebuilt head match this stream"""
+        args = list(REENCODE_ARGS[self.codec])
+        if self.pix_fmt:
+            args += ['-pix_fmt', self.pix_fmt]
+        if self.width and self.height:
+            args += ['-s', f'{self.width}x{self.height}']
+        if self.codec == 'h264':
+            if self.profile:
+                # ffprobe says 'Constrained Baseline', x264 wants 'baseline'
+                args += ['-profile:v', self.profile.split()[-1].lower()]
+            if self.level and self.level > 0:
+                args += ['-level:v', f'{self.level / 10:g}']
+        elif self.codec == 'vp9' and self.profile and self.profile.startswith('Profile '):
+            args += ['-profile:v', self.profile.split()[-1]]
+        if suffix in ('.mp4', '.mov') and self.time_base:
+            # MP4 tracks carry their own time base; Matroska is always 1/1000
+            _, _, timescale = self.time_base.partition('/')
+            if timescale.isdigit():
+                args += ['-video_track_timescale', timescale]
+        return args
+
+
+def parse_time(value: str) -> float:
+    """Parse 'SS', 'MM:SS' or 'HH:MM:SS(.ms)'; a leading '-' counts from the end"""
+    value = value.strip()
+    sign = -1 if value.startswith('-') else 1
+    seconds = 0.0
+    for part in value.lstrip('-').split(':'):
+        seconds = seconds * 60 + float(part)
+    return sign * seconds
+
+
+def format_time(seconds: float) -> str:
+    minutes, seconds = divmod(seconds, 60)
+    return f"{int(minutes):02d}:{seconds:06.3f}"
+
+
+def probe_stream(path: Path) -> StreamInfo:
+    """Return the first video stream's parameters and the container duration"""
+    result = subprocess.run(
+        ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+         '-show_entries', 'stream=codec_name,profile,level,pix_fmt,width,height,time_base:format=duration',
+         '-of', 'json', str(path)],
+        capture_output=True, text=True, check=True
+    )
+    info = json.loads(result.stdout)
+    if not info.get('streams'):
+        raise ValueError(f"{path.name} has no video stream")
+    duration = float(info.get('format', {}).get('duration') or 0)
+    return StreamInfo(info['streams'][0], duration)
+
+
+def iter_packets(path: Path, fields: str = 'pts_time,flags') -> Iterator[List[str]]:
+    """Stream video packet fields from ffprobe one packet at a time"""
+    process = subprocess.Popen(
+        ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+         '-show_entries', f'packet={fields}', '-of', 'csv=p=0', str(path)],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    try:
+        for line in process.stdout:
+            values = line.strip().split(',')
+            if values and values[0] not in ('', 'N/A'):
+                yield values
+    finally:
+        process.stdout.close()
+        process.wait()
+
+
+def keyframe_index(path: Path) -> Tuple[List[float], List[float]]:
+    """Return (sorted packet timestamps, sorted keyframe timestamps)"""
+    timestamps = []
+    keyframes = []
+    for pts, flags in iter_packets(path):
+        t = float(pts)
+        timestamps.append(t)
+        if 'K' in flags:
+            keyframes.append(t)
+    timestamps.sort()
+    keyframes.sort()
+    return timestamps, keyframes
+
+
+def _run(cmd: List[str]):
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+def full_reencode(source: Path, start: float, end: float, output: Path, encoder_args: List[str]):
+    """Re-encode [start, end) of `source` into `output`"""
+    _run(['ffmpeg', '-y', '-ss', f'{start:.6f}', '-i', str(source), '-t', f'{end - start:.6f}',
+          '-map', '0:v:0'] + encoder_args + [str(output)])
+
+
+def smart_cut(source: Path, start: float, end: Optional[float], output: Path,
+              index: Optional[Tuple[List[float], List[float]]] = None) -> TrimResult:
+    """Write [start, end) of `source` to `output`, re-encoding only the head GOP fragment"""
+    began = time.perf_counter()
+    stream = probe_stream(source)
+    duration = stream.duration
+    if end is None or end > duration:
+        end = duration
+    if not 0 <= start < end:
+        raise ValueError(f"Invalid range {format_time(start)}–{format_time(end)}")
+
+    suffix = output.suffix or source.suffix
+    if stream.codec not in REENCODE_ARGS:
+        fallback_codec = FALLBACK_CODECS.get(suffix, DEFAULT_FALLBACK_CODEC)
+        full_reencode(source, start, end, output, REENCODE_ARGS[fallback_codec])
+        frames = sum(1 for _ in iter_packets(output))
+        return TrimResult(output, frames, 0, time.perf_counter() - began,
+                          fallback=f"{stream.codec} can't be smart-cut")
+    encoder_args = stream.encoder_args(suffix)
+    timestamps, keyframes = index or keyframe_index(source)
+
+    # First keyframe at or after the cut; everything before it has to be rebuilt
+    epsilon = 1e-3
+    copy_from = next((k for k in keyframes if k >= start - epsilon), end)
+    copy_from = min(copy_from, end)
+    reencoded = sum(1 for t in timestamps if start - epsilon <= t < copy_from - epsilon)
+    copied = sum(1 for t in timestamps if copy_from - epsilon <= t < end - epsilon)
+
+    with tempfile.TemporaryDirectory(prefix='recit-trim-') as tmp:
+        parts = []
+        if reencoded:
+            head = Path(tmp) / f'head{suffix}'
+            full_reencode(source, start, copy_from, head, encoder_args)
+            mismatch = probe_stream(head).differences(stream) if copied else []
+            if mismatch:
+                # The encoder didn't reproduce the source's parameters; concat would corrupt the body
+                full_reencode(source, start, end, output, encoder_args)
+                return TrimResult(output, reencoded + copied, 0, time.perf_counter() - began,
+                                  fallback=", ".join(mismatch))
+            parts.append(head)
+        if copied:
+            body = Path(tmp) / f'body{suffix}'
+            # Input seeking lands exactly on the keyframe, so this copy is frame-accurate
+            _run(['ffmpeg', '-y', '-ss', f'{copy_from:.6f}', '-i', str(source), '-t', f'{end - copy_from:.6f}',
+                  '-map', '0:v:0', '-c', 'copy', '-avoid_negative_ts', 'make_zero', str(body)])
+            parts.append(body)
+
+        if len(parts) == 1:
+            shutil.move(str(parts[0]), str(output))
+        else:
+            listing = Path(tmp) / 'parts.txt'
+            listing.write_text(''.join(f"file '{p}'\n" for p in parts))
+            _run(['ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', str(listing), '-c', 'copy', str(output)])
+
+    return TrimResult(output, reencoded, copied, time.perf_counter() - began)
+
+
+def trim(source: Path, start: float = 0.0, end: Optional[float] = None,
+         output: Optional[Path] = None) -> TrimResult:
+    """Trim a recording; negative times count back from the end"""
+    duration = probe_stream(source).duration
+    start = duration + start if start < 0 else start
+    if end is not None and end <= 0:
+        end = duration + end
+    output = output or source.with_name(f'{source.stem}_trim{source.suffix}')
+    return smart_cut(source, start, end, output)
+
+
+def split(source: Path, points: List[float]) -> List[TrimResult]:
+    """Split a recording at each time in `points`"""
+    duration = probe_stream(source).duration
+    index = keyframe_index(source)
+    bounds = [0.0] + sorted(duration + p if p < 0 else p for p in points) + [duration]
+    results = []
+    for number, (start, end) in enumerate(zip(bounds, bounds[1:]), 1):
+        if end - start <= 0:
+            continue
+        output = source.with_name(f'{source.stem}_split{number}{source.suffix}')
+        results.append(smart_cut(source, start, end, output, index=index))
+    return results
+
+
+def capture_time(path: Path) -> float:
+    """When a recording was captured, from the timestamp in its name (else its mtime)"""
+    match = re.match(r'recording_(\d{8}_\d{6})', path.name)
+    if match:
+        return datetime.strptime(match.group(1), '%Y%m%d_%H%M%S').timestamp()
+    return path.stat().st_mtime
+
+
+def latest_recording(directory: Path) -> Optional[Path]:
+    """Most recently captured recording in `directory`.
+
+    Ordered by capture time rather than mtime, so files written later from
+    old recordings (compact copies, trims) don't count as the latest.
+    """
+    recordings = [p for p in directory.glob('recording_*') if p.suffix in ('.webm', '.mkv', '.mp4')]
+    return max(recordings, key=lambda p: (capture_time(p), p.stat().st_mtime), default=None)
+
+
+def split_points(value: str) -> List[float]:
+    """Parse a comma-separated list of times"""
+    return [parse_time(part) for part in re.split(r'[,\s]+', value.strip()) if part]
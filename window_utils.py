@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+X window selection and tracking utilities for window-targeted capture
+"""
+
+import re
+import subprocess
+import threading
+from typing import Callable, Optional, Tuple
+
+Geometry = Tuple[int, int, int, int]
+
+
+def select_window_by_click(timeout: float = 30) -> Optional[str]:
+    """Let the user click a window and return its id"""
+    result = subprocess.run(['xwininfo'], capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        return None
+    match = re.search(r'Window id:\s+(0x[0-9a-fA-F]+)', result.stdout)
+    return match.group(1) if match else None
+
+
+def find_window(title: Optional[str] = None, wm_class: Optional[str] = None) -> Optional[str]:
+    """Find the first visible window whose title or class matches (regex)"""
+    cmd = ['xdotool', 'search', '--onlyvisible']
+    if wm_class:
+        cmd += ['--class', wm_class]
+    elif title:
+        cmd += ['--name', title]
+    else:
+        return None
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
+    ids = result.stdout.split()
+    return hex(int(ids[0])) if ids else None
+
+
+def window_geometry(window_id: str) -> Optional[Geometry]:
+    """Return the absolute (x, y, width, height) of a window, or None if it is gone"""
+    cmd = ['xwininfo', '-root'] if window_id == 'root' else ['xwininfo', '-id', window_id]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+
+    values = {}
+    for key, pattern in (('x', r'Absolute upper-left X:\s+(-?\d+)'),
+                         ('y', r'Absolute upper-left Y:\s+(-?\d+)'),
+                         ('w', r'Width:\s+(\d+)'),
+                         ('h', r'Height:\s+(\d+)')):
+        match = re.search(pattern, result.stdout)
+        if not match:
+            return None
+        values[key] = int(match.group(1))
+    if 'Map State: IsUnMapped' in result.stdout:
+        return None
+    return values['x'], values['y'], values['w'], values['h']
+
+
+def clamp_geometry(geometry: Geometry, screen: Tuple[int, int]) -> Geometry:
+    """Clip a window rectangle to the screen and round it to even dimensions"""
+    x, y, w, h = geometry
+    screen_w, screen_h = screen
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(screen_w, x + w), min(screen_h, y + h)
+    w = max(2, (x1 - x0) // 2 * 2)
+    h = max(2, (y1 - y0) // 2 * 2)
+    return min(x0, screen_w - w), min(y0, screen_h - h), w, h
+
+
+def window_filter(geometry: Geometry, output_size: Tuple[int, int]) -> str:
+    """Crop the window out of the screen and letterbox it into a fixed output size"""
+    x, y, w, h = geometry
+    out_w, out_h = output_size
+    return (f"crop={w}:{h}:{x}:{y},"
+            f"scale={out_w}:{out_h}:force_original_aspect_ratio=decrease,"
+            f"pad={out_w}:{out_h}:(ow-iw)/2:(oh-ih)/2,setsar=1")
+
+
+def crop_commands(geometry: Geometry) -> str:
+    """ffmpeg interactive commands that move the crop to `geometry` immediately"""
+    x, y, w, h = geometry
+    return "".join(f"ccrop -1 {key} {value}\n" for key, value in (('w', w), ('h', h), ('x', x), ('y', y)))
+
+
+class WindowTracker:
+    """Poll a window's geometry and report moves and resizes"""
+
+    def __init__(self, window_id: str, screen: Tuple[int, int], initial: Geometry,
+                 on_change: Callable[[Geometry], None], interval: float = 0.25):
+        self.window_id = window_id
+        self.screen = screen
+        self.on_change = on_change
+        self.interval = interval
+        self.last = initial
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="recit-window-tracker", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def resend(self):
+        """Report the current geometry again on the next poll (e.g. to a new process)"""
+        self.last = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            geometry = window_geometry(self.window_id)
+            if geometry is None:
+                # Window closed or unmapped: keep recording the last position
+                self.lost = True
+                continue
+            self.lost = False
+            geometry = clamp_geometry(geometry, self.screen)
+            if geometry != self.last:
+                self.last = geometry
+                try:
+                    self.on_change(geometry)
+                except (OSError, ValueError):
+                    pass